@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from power_stub_server import build_point_response
+from weather_data_etl import BackgroundLogWriter, CsvSink, WeatherDataFetcher, decode_weather_payload
+
+
+def legacy_process_weather_data(weather_json, location):
+    """The original dict-of-dicts transform, kept as the baseline."""
+    records = weather_json.get('properties', {}).get('parameter', {})
+    weather_df = pd.DataFrame.from_dict(records)
+    weather_df = weather_df[['RH2M', 'WS2M', 'PRECTOTCORR', 'T2M_MAX', 'T2M_MIN']]
+    weather_df.columns = ['Humidity', 'Wind_Speed', 'Precipitation', 'Temperature_Max', 'Temperature_Min']
+    weather_df = weather_df.reset_index().rename(columns={'index': 'date'})
+    weather_df['date'] = pd.to_datetime(weather_df['date'], format='%Y%m%d')
+    weather_df['state'] = location
+    return weather_df[['date', 'state', 'Temperature_Max', 'Temperature_Min', 'Humidity', 'Precipitation', 'Wind_Speed']]
+
+
+def sample_payload(years, longitude=80.27, latitude=13.08):
+    """Returns a POWER response body covering `years` years of daily data."""
+    query = {
+        "longitude": str(longitude), "latitude": str(latitude),
+        "start": f"{2024 - years}0101", "end": "20231231",
+        "parameters": "TMAX,TMIN,RH2M,PRECTOTCORR,WS2M"
+    }
+    return json.dumps(build_point_response(query)).encode("utf-8")
+
+
+def measure(function, repeat):
+    """Returns the best wall time of `repeat` calls and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_process(years=40, repeat=5):
+    """Rows/sec of decode + transform, original path against the optimized one."""
+    content = sample_payload(years)
+    fetcher = WeatherDataFetcher(["Chennai"], "20240101", "20240101", geocode_cache=False, response_cache=False)
+
+    legacy_time, legacy_df = measure(lambda: legacy_process_weather_data(json.loads(content), "Chennai"), repeat)
+    fast_time, fast_df = measure(lambda: fetcher.process_weather_data(decode_weather_payload(content), "Chennai"), repeat)
+
+    rows = len(fast_df)
+    assert rows == len(legacy_df)
+    print(f"process_weather_data: {rows} rows ({years} years)")
+    print(f"  before: {rows / legacy_time:12,.0f} rows/sec ({legacy_time * 1000:.1f} ms)")
+    print(f"  after:  {rows / fast_time:12,.0f} rows/sec ({fast_time * 1000:.1f} ms)")
+
+
+def path_size(path):
+    """Returns the size in bytes of a file or of everything below a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def bench_sinks(locations=50, years=10):
+    """Write throughput and output size of every sink on the same merged dataset."""
+    fetcher = WeatherDataFetcher([], "20240101", "20240101", geocode_cache=False, response_cache=False)
+    frames = [fetcher.process_weather_data(decode_weather_payload(sample_payload(years, 70 + i, 10 + i / 10)), f"City {i}")
+              for i in range(locations)]
+    weather_df = fetcher._output_frame(fetcher.merge_weather_frames(frames))
+    rows = len(weather_df)
+
+    sinks = {
+        "csv": lambda directory: CsvSink(),
+        "csv.gz": lambda directory: CsvSink("gzip"),
+        "csv.zst": lambda directory: CsvSink("zstd"),
+        "parquet": lambda directory: fetcher.create_sink("parquet"),
+        "feather": lambda directory: fetcher.create_sink("feather"),
+        "sqlite": lambda directory: fetcher.create_sink("sqlite"),
+        "duckdb": lambda directory: fetcher.create_sink("duckdb")
+    }
+    print(f"Output sinks: {rows} rows ({locations} locations x {years} years)")
+    for name, make_sink in sinks.items():
+        with tempfile.TemporaryDirectory() as directory:
+            fetcher.data_directory = directory
+            try:
+                sink = make_sink(directory)
+            except ImportError as e:
+                print(f"  {name:8} skipped: {e}")
+                continue
+            started = time.perf_counter()
+            path = sink.write(weather_df, directory, "weather_data_benchmark")
+            elapsed = time.perf_counter() - started
+            print(f"  {name:8} {rows / elapsed:12,.0f} rows/sec {path_size(path) / 1e6:9.2f} MB")
+
+
+def legacy_write_log(log_file, log_entry, lock):
+    """The original logger: open, append and close the file for every message."""
+    with lock:
+        with open(log_file, 'a') as f:
+            json.dump(log_entry, f)
+            f.write("\n")
+
+
+def bench_logging(messages=20000, threads=8):
+    """Messages/sec logged from worker threads, per-message file open against the background writer."""
+    entry = {"Date": "2024-01-01 00:00:00", "Content": "GET https://power.larc.nasa.gov/... -> 200", "Path": "log"}
+    per_thread = messages // threads
+    print(f"Logging: {per_thread * threads} messages from {threads} threads")
+    with tempfile.TemporaryDirectory() as directory:
+        lock = threading.Lock()
+        writer = BackgroundLogWriter()
+        loggers = {
+            "before": lambda path: legacy_write_log(path, entry, lock),
+            "after": lambda path: writer.write(path, entry)
+        }
+        for name, log in loggers.items():
+            path = os.path.join(directory, f"{name}.json")
+
+            def worker():
+                for _ in range(per_thread):
+                    log(path)
+
+            started = time.perf_counter()
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            logged = time.perf_counter() - started
+            writer.flush()
+            flushed = time.perf_counter() - started
+            with open(path) as f:
+                assert sum(1 for _ in f) == per_thread * threads
+            print(f"  {name:7} {per_thread * threads / logged:12,.0f} messages/sec in workers "
+                  f"({logged * 1000:.0f} ms, on disk after {flushed * 1000:.0f} ms)")
+        writer.close()
+
+
+def bench_upload(files=8, size_mb=16, endpoint_url=None):
+    """S3 upload throughput, one file at a time against the parallel multipart engine.
+
+    Runs on a moto bucket, or on a local S3 emulator (e.g. MinIO) when `endpoint_url` is given.
+    """
+    if endpoint_url:
+        backend, mock = endpoint_url, contextlib.nullcontext
+    else:
+        try:
+            from moto import mock_aws
+        except ImportError as e:
+            print(f"S3 upload skipped: {e}")
+            return
+        backend, mock = "moto", mock_aws
+        os.environ.update(AWS_ACCESS_KEY_ID="benchmark", AWS_SECRET_ACCESS_KEY="benchmark", AWS_REGION="us-east-1")
+    os.environ.setdefault("S3_BUCKET_NAME", "weather-benchmark")
+
+    settings = {
+        "sequential": dict(upload_workers=1, upload_concurrency=1),
+        "parallel": dict(upload_workers=4, upload_concurrency=10, multipart_chunksize=8 * 1024 * 1024)
+    }
+    print(f"S3 upload: {files} files x {size_mb} MB ({backend})")
+    for name, options in settings.items():
+        with tempfile.TemporaryDirectory() as directory, mock():
+            fetcher = WeatherDataFetcher([], "20240101", "20240101", geocode_cache=False, response_cache=False,
+                                         s3_endpoint_url=endpoint_url, **options)
+            fetcher.data_directory = directory
+
+            started = time.perf_counter()
+            s3, bucket_name = fetcher._create_s3_client()
+            first = time.perf_counter() - started
+            started = time.perf_counter()
+            fetcher._create_s3_client()
+            cached = time.perf_counter() - started
+            try:
+                s3.create_bucket(Bucket=bucket_name)
+            except s3.exceptions.BucketAlreadyOwnedByYou:
+                pass
+
+            paths = []
+            for i in range(files):
+                paths.append(os.path.join(directory, f"part-{i}.bin"))
+                with open(paths[-1], "wb") as handle:
+                    handle.write(os.urandom(size_mb * 1024 * 1024))
+            started = time.perf_counter()
+            fetcher.upload_csv_to_s3(paths)
+            elapsed = time.perf_counter() - started
+            print(f"  {name:10} {files * size_mb / elapsed:9.1f} MB/s ({elapsed:.2f} s), "
+                  f"client {first * 1000:.1f} ms first / {cached * 1000:.3f} ms cached")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the weather ETL pipeline.")
+    parser.add_argument("--years", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--locations", type=int, default=50, help="Locations in the sink benchmark")
+    parser.add_argument("--upload-files", type=int, default=8, help="Files in the S3 upload benchmark")
+    parser.add_argument("--s3-endpoint", help="S3 emulator endpoint for the upload benchmark (default: moto)")
+    args = parser.parse_args()
+
+    bench_process(args.years, args.repeat)
+    bench_sinks(args.locations, min(args.years, 10))
+    bench_logging()
+    bench_upload(args.upload_files, endpoint_url=args.s3_endpoint)
@@ -0,0 +1,120 @@
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class PowerStubHandler(BaseHTTPRequestHandler):
+    """Serves deterministic NASA POWER style daily point and regional responses."""
+
+    latency = 0.0  # Seconds to sleep before answering, to mimic the real API
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path.endswith("/temporal/daily/point"):
+            build_response = build_point_response
+        elif url.path.endswith("/temporal/daily/regional"):
+            build_response = build_regional_response
+        else:
+            self._send_json(404, {"messages": [f"Unknown endpoint {url.path}"]})
+            return
+
+        try:
+            body = build_response(query)
+        except (KeyError, ValueError) as e:
+            self._send_json(422, {"messages": [f"Invalid request: {e}"]})
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+        self._send_json(200, body)
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Keep test and benchmark output quiet
+
+
+def build_point_response(query):
+    """Builds a POWER-shaped JSON body for the requested parameters, point and date range."""
+    return build_point_feature(float(query["longitude"]), float(query["latitude"]), query)
+
+
+def build_regional_response(query):
+    """Builds a FeatureCollection with one feature per 0.5 x 0.625 degree grid point in the box."""
+    latitude_min, latitude_max = float(query["latitude-min"]), float(query["latitude-max"])
+    longitude_min, longitude_max = float(query["longitude-min"]), float(query["longitude-max"])
+    if not (0 < latitude_max - latitude_min <= 10 and 0 < longitude_max - longitude_min <= 10):
+        raise ValueError("bounding box sides must be between 0 and 10 degrees")
+
+    latitudes = [i * 0.5 for i in range(int(latitude_min // 0.5), int(latitude_max // 0.5) + 1)
+                 if latitude_min <= i * 0.5 <= latitude_max]
+    longitudes = [i * 0.625 for i in range(int(longitude_min // 0.625), int(longitude_max // 0.625) + 1)
+                  if longitude_min <= i * 0.625 <= longitude_max]
+    return {
+        "type": "FeatureCollection",
+        "features": [build_point_feature(longitude, latitude, query) for latitude in latitudes for longitude in longitudes]
+    }
+
+
+def build_point_feature(longitude, latitude, query):
+    """Builds one POWER feature with deterministic values derived from the coordinates."""
+    start = datetime.strptime(query["start"], "%Y%m%d")
+    end = datetime.strptime(query["end"], "%Y%m%d")
+    parameters = query["parameters"].split(",")
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    seed = abs(longitude) + abs(latitude)
+    # Values depend only on point, parameter and day, so point, regional and chunked answers agree
+    records = {
+        parameter: {day.strftime("%Y%m%d"): round((seed * (sum(map(ord, parameter)) % 7 + 1) + day.toordinal()) % 40, 2)
+                    for day in days}
+        for parameter in parameters
+    }
+    # POWER answers T2M_MAX/T2M_MIN for TMAX/TMIN
+    for alias, name in (("TMAX", "T2M_MAX"), ("TMIN", "T2M_MIN")):
+        if alias in records:
+            records[name] = records.pop(alias)
+
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude, 0.0]},
+        # Real POWER responses always carry the fill value in their header
+        "header": {"title": "NASA/POWER stub", "fill_value": -999.0, "start": query["start"], "end": query["end"]},
+        "properties": {"parameter": records}
+    }
+
+
+def start_stub_server(host="127.0.0.1", port=0, latency=0.0):
+    """Starts the stub in a background thread and returns (server, base_url)."""
+    handler = type("PowerStubHandler", (PowerStubHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/api/temporal/daily/point"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the NASA POWER daily point and regional API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay each response")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.host, args.port, args.latency)
+    print(f"Serving POWER stub at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,73 @@
+import glob
+import json
+import os
+import sys
+import zlib
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from power_stub_server import start_stub_server
+from weather_data_etl import GeoPoint, WeatherDataFetcher
+
+
+class FakeGeocoder:
+    """Deterministic coordinates derived from the name, so tests never reach Nominatim."""
+
+    def geocode(self, query):
+        h = zlib.crc32(query.encode("utf-8")) % 1000
+        return GeoPoint(query, 10 + h / 100, 70 + h / 50)
+
+
+@pytest.fixture(scope="session")
+def stub_url():
+    server, base_url = start_stub_server()
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def make_fetcher(tmp_path, monkeypatch, stub_url):
+    """Builds fetchers pointed at the stub server, writing under tmp_path and not uploading.
+
+    The response cache is off unless asked for, so every run in a test reaches the stub.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def make(locations, start_date, end_date, base_url=None, upload=False, **kwargs):
+        kwargs.setdefault("geocoder", FakeGeocoder())
+        kwargs.setdefault("response_cache", False)
+        fetcher = WeatherDataFetcher(locations, start_date, end_date, **kwargs)
+        fetcher.base_url = base_url or stub_url
+        fetcher.regional_url = fetcher.base_url.replace("/point", "/regional")
+        fetcher.data_directory = str(tmp_path / "data")
+        fetcher.log_directory = str(tmp_path / "logs")
+        if not upload:
+            monkeypatch.setattr(fetcher, "upload_csv_to_s3", lambda *args, **kwargs: None)
+        return fetcher
+
+    return make
+
+
+def output_path(fetcher):
+    """Returns the CSV file written for the fetcher's date window."""
+    name = f"weather_data_{fetcher.start_date}_{fetcher.end_date}.csv*"
+    paths = glob.glob(os.path.join(fetcher.data_directory, "*", name))
+    assert len(paths) == 1, paths
+    return paths[0]
+
+
+def read_output(fetcher):
+    """Returns the CSV output of the fetcher's date window sorted by state and date."""
+    output_df = pd.read_csv(output_path(fetcher))
+    return output_df.sort_values(["state", "date"], ignore_index=True)
+
+
+def read_log(log_file):
+    """Returns the Content of every entry in a JSON-lines log file."""
+    if log_file is None or not os.path.exists(log_file):
+        return []
+    with open(log_file) as f:
+        return [json.loads(line)["Content"] for line in f]
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from conftest import read_output
+from power_stub_server import build_point_response
+from weather_data_etl import decode_weather_payload
+
+LOCATIONS = ["Chennai", "Mumbai", "Delhi"]
+
+
+def payload(start="20200101", end="20200131"):
+    query = {"parameters": "TMAX,TMIN,RH2M,PRECTOTCORR,WS2M", "longitude": "80.25", "latitude": "13.0",
+             "start": start, "end": end}
+    return decode_weather_payload(json.dumps(build_point_response(query)).encode("utf-8"))
+
+
+def test_compact_schema_dtypes_and_values(make_fetcher):
+    wide = make_fetcher(LOCATIONS, "20200101", "20200131").process_weather_data(payload(), "Chennai")
+    compact = make_fetcher(LOCATIONS, "20200101", "20200131",
+                           compact_dtypes=True).process_weather_data(payload(), "Chennai")
+
+    assert compact["date"].dtype == np.int32 and compact["date"].iloc[0] == (pd.Timestamp("2020-01-01") -
+                                                                            pd.Timestamp("1970-01-01")).days
+    assert isinstance(compact["state"].dtype, pd.CategoricalDtype)
+    measures = wide.columns.difference(["date", "state"])
+    assert (compact[measures].dtypes == np.float32).all()
+    assert np.allclose(compact[measures].to_numpy(np.float64), wide[measures].to_numpy(), atol=1e-5)
+    assert compact.memory_usage(deep=True).sum() < wide.memory_usage(deep=True).sum() / 2
+
+
+def test_merged_compact_frames_stay_categorical(make_fetcher):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", compact_dtypes=True)
+    frames = [fetcher.process_weather_data(payload(), location) for location in LOCATIONS + ["Chennai"]]
+    merged = fetcher.merge_weather_frames(frames)
+
+    assert isinstance(merged["state"].dtype, pd.CategoricalDtype)
+    assert len(merged) == 31 * len(LOCATIONS)
+
+
+def test_compact_runs_write_the_same_output(make_fetcher):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131")
+    fetcher.fetch_and_process_weather()
+    wide = read_output(fetcher)
+
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", compact_dtypes=True, max_workers=2)
+    fetcher.fetch_and_process_weather()
+    assert read_output(fetcher).equals(wide)
+
+    incremental = make_fetcher(LOCATIONS, "20200115", "20200210", compact_dtypes=True, incremental=True)
+    incremental.fetch_and_process_weather()
+    full = make_fetcher(LOCATIONS, "20200115", "20200210")
+    full.fetch_and_process_weather()
+    assert read_output(incremental).equals(read_output(full))
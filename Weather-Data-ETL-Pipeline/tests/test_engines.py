@@ -0,0 +1,77 @@
+import asyncio
+import glob
+import os
+
+import pytest
+
+from conftest import read_output
+
+LOCATIONS = ["Chennai", "Mumbai", "Delhi", "Pune", "Chennai"]
+
+
+def run(make_fetcher, engine, output_format="csv"):
+    """Runs one engine over LOCATIONS for 2020 and returns the fetcher."""
+    options = {
+        "serial": dict(),
+        "thread": dict(max_workers=4),
+        "async": dict(),
+        "regional": dict(extraction_mode="regional"),
+        "streaming": dict(max_workers=4, streaming=True),
+        "streaming-async": dict(streaming=True),
+        "backfill": dict(max_workers=2, backfill_chunk="month")
+    }[engine]
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20201231", output_format=output_format, **options)
+    if engine.endswith("async"):
+        pytest.importorskip("aiohttp")
+        asyncio.run(fetcher.fetch_and_process_weather_async(concurrency=8))
+    else:
+        fetcher.fetch_and_process_weather()
+    fetcher.flush_logs()
+    return fetcher
+
+
+@pytest.mark.parametrize("engine", ["thread", "async", "regional", "streaming", "streaming-async", "backfill"])
+def test_engines_write_the_same_rows(make_fetcher, engine):
+    expected = read_output(run(make_fetcher, "serial"))
+    assert len(expected) == 4 * 366  # The repeated location is merged away
+
+    actual = read_output(run(make_fetcher, engine))
+    assert actual.equals(expected)
+
+
+@pytest.mark.parametrize("merge_keep", [False, None, "none", "LAST"])
+def test_merge_keep_is_validated(make_fetcher, merge_keep):
+    with pytest.raises(ValueError, match="merge_keep"):
+        make_fetcher(LOCATIONS, "20200101", "20200131", merge_keep=merge_keep)
+
+
+def test_grid_dedup_requests_each_cell_once(make_fetcher):
+    fetcher = run(make_fetcher, "thread")
+    # Four distinct locations, the fifth repeats Chennai
+    assert fetcher.connection_stats()["requests"] == 4
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_connection_stats_count_every_engine(make_fetcher, engine):
+    stats = run(make_fetcher, engine).connection_stats()
+
+    assert stats["requests"] == 4
+    assert 1 <= stats["connections_opened"] <= 4
+    assert stats["connections_reused"] == 4 - stats["connections_opened"]
+
+
+def test_streaming_failure_leaves_no_partial_output(make_fetcher, monkeypatch):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", streaming=True)
+    writes = []
+    output_frame = fetcher._output_frame
+
+    def failing_output_frame(weather_df):
+        writes.append(len(weather_df))
+        if len(writes) == 2:
+            raise RuntimeError("disk full")
+        return output_frame(weather_df)
+
+    monkeypatch.setattr(fetcher, "_output_frame", failing_output_frame)
+    fetcher.fetch_and_process_weather()
+
+    assert glob.glob(os.path.join(fetcher.data_directory, "*", "weather_data_*")) == []
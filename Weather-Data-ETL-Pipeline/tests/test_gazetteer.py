@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from weather_data_etl import ChainedGeocoder, GazetteerGeocoder, GeoPoint
+
+# name, alternate names, latitude, longitude, feature code, country code, admin1 code, population
+PLACES = [
+    ("Paris", "Lutece", 48.85, 2.35, "PPLC", "FR", "11", 2138551),
+    ("Paris", "", 33.66, -95.56, "PPLA2", "US", "TX", 24782),
+    ("Paris", "", 36.30, -88.33, "PPLA2", "US", "TN", 10156),
+    ("Parma", "", 44.80, 10.33, "PPLA2", "IT", "45", 146299),
+    ("Mumbai", "Bombay,Bombaim", 19.07, 72.88, "PPLA", "IN", "16", 12691836),
+    ("Chennai", "Madras", 13.09, 80.28, "PPLA", "IN", "25", 4646732),
+    ("Santiago", "", -33.46, -70.65, "PPLC", "CL", "12", 4837295),
+    ("France", "", 46.0, 2.0, "PCLI", "FR", "00", 66987244),
+    ("United States", "USA,United States of America", 39.76, -98.5, "PCLI", "US", "00", 327167434),
+    ("Texas", "", 31.25, -99.25, "ADM1", "US", "TX", 22875689),
+]
+
+
+def write_gazetteer(path, places):
+    with open(path, "w", encoding="utf-8") as f:
+        for geonameid, (name, alternates, latitude, longitude, code, country, admin1, population) in enumerate(places):
+            columns = [str(geonameid), name, name, alternates, str(latitude), str(longitude), code[0], code,
+                       country, "", admin1, "", "", "", str(population), "", "", "", "2024-01-01"]
+            f.write("\t".join(columns) + "\n")
+
+
+@pytest.fixture
+def gazetteer_path(tmp_path):
+    path = str(tmp_path / "cities.txt")
+    # Filler names around the real ones exercise the bisect and the fuzzy window
+    fillers = [(f"{prefix}{i:04d}", "", 0.0, 0.0, "PPL", "XX", "", i) for prefix in ("ch", "pa", "sa") for i in range(300)]
+    write_gazetteer(path, PLACES + fillers)
+    return path
+
+
+def test_exact_lookup_returns_the_most_populous_homonym(gazetteer_path):
+    geocoder = GazetteerGeocoder(gazetteer_path)
+
+    assert geocoder.geocode("  PARIS ") == GeoPoint("paris", 48.85, 2.35)
+    assert geocoder.geocode("chennai") == GeoPoint("chennai", 13.09, 80.28)
+    assert geocoder.geocode("Atlantis") is None
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Paris, France", (48.85, 2.35)),
+    ("Paris, Texas", (33.66, -95.56)),
+    ("Paris, TN", (36.30, -88.33)),
+    ("Paris, US", (33.66, -95.56)),
+    ("Paris, Texas, USA", (33.66, -95.56)),
+    ("Santaigo, CL", (-33.46, -70.65)),
+])
+def test_qualifiers_pick_the_homonym_in_that_region(gazetteer_path, query, expected):
+    result = GazetteerGeocoder(gazetteer_path).geocode(query)
+    assert (result.latitude, result.longitude) == expected
+
+
+def test_unmatched_qualifiers_fall_through_to_the_next_geocoder(gazetteer_path):
+    class Fallback:
+        queries = []
+
+        def geocode(self, query):
+            self.queries.append(query)
+            return GeoPoint(query, 0.0, 0.0)
+
+    fallback = Fallback()
+    geocoder = ChainedGeocoder([GazetteerGeocoder(gazetteer_path), fallback])
+
+    assert GazetteerGeocoder(gazetteer_path).geocode("Paris, Ontario") is None
+    assert geocoder.geocode("Paris, Ontario").address == "Paris, Ontario"
+    assert geocoder.geocode("Paris, Texas").address == "paris"
+    assert fallback.queries == ["Paris, Ontario"]
+
+
+def test_fuzzy_matches_misspellings_near_the_insertion_point(gazetteer_path):
+    assert GazetteerGeocoder(gazetteer_path).geocode("Santaigo").address == "santiago"
+    assert GazetteerGeocoder(gazetteer_path).geocode("Chenai").address == "chennai"
+    assert GazetteerGeocoder(gazetteer_path, fuzzy_cutoff=0).geocode("Santaigo") is None
+
+
+def test_prefix_search_orders_by_population(gazetteer_path):
+    names = [point.address for point in GazetteerGeocoder(gazetteer_path).search_prefix("par", limit=3)]
+    assert names == ["paris", "parma", "paris"]
+
+
+def test_index_is_rebuilt_when_build_options_change(gazetteer_path):
+    assert GazetteerGeocoder(gazetteer_path).geocode("Bombay") is None
+    assert GazetteerGeocoder(gazetteer_path, include_alternate_names=True).geocode("Bombay").address == "bombay"
+    assert GazetteerGeocoder(gazetteer_path).geocode("Bombay") is None
+
+
+def test_index_is_rebuilt_when_the_file_changes(gazetteer_path):
+    assert GazetteerGeocoder(gazetteer_path).geocode("Pune") is None
+
+    write_gazetteer(gazetteer_path, PLACES + [("Pune", "", 18.52, 73.86, "PPL", "IN", "16", 3124458)])
+    index_mtime = os.path.getmtime(f"{gazetteer_path}.index/meta.json")
+    os.utime(gazetteer_path, (index_mtime + 1, index_mtime + 1))
+
+    assert GazetteerGeocoder(gazetteer_path).geocode("Pune").address == "pune"
@@ -0,0 +1,73 @@
+import os
+import time
+
+import pytest
+
+from conftest import FakeGeocoder
+from weather_data_etl import GeocodeCache
+
+
+class CountingGeocoder(FakeGeocoder):
+    def __init__(self):
+        self.queries = []
+
+    def geocode(self, query):
+        self.queries.append(query)
+        return super().geocode(query)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GeocodeCache(str(tmp_path / "geocode_cache.sqlite"))
+
+
+def test_hits_use_the_normalized_name(cache):
+    assert cache.get("Chennai") == (False, None)
+    cache.put("Chennai", (80.27, 13.08))
+
+    assert cache.get("  CHENNAI ") == (True, (80.27, 13.08))
+    assert cache.stats() == {"hits": 1, "negative_hits": 0, "misses": 1}
+
+
+def test_not_found_answers_are_cached_and_expire_sooner(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode_cache.sqlite"), ttl_days=1, negative_ttl_days=0.05 / 86400)
+    cache.put("Atlantis", None)
+    cache.put("Chennai", (80.27, 13.08))
+    assert cache.get("Atlantis") == (True, None)
+    assert cache.stats()["negative_hits"] == 1
+
+    time.sleep(0.1)
+    assert cache.get("Atlantis") == (False, None)
+    assert cache.get("Chennai") == (True, (80.27, 13.08))
+
+
+def test_found_entries_expire_after_ttl(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode_cache.sqlite"), ttl_days=0.05 / 86400)
+    cache.put("Chennai", (80.27, 13.08))
+    time.sleep(0.1)
+
+    assert cache.get("Chennai") == (False, None)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode_cache.sqlite"), max_entries=2)
+    cache.put("Chennai", (80.27, 13.08))
+    time.sleep(0.01)
+    cache.put("Mumbai", (72.88, 19.08))
+    time.sleep(0.01)
+    cache.get("Chennai")
+    time.sleep(0.01)
+    cache.put("Delhi", (77.21, 28.61))
+
+    assert cache.get("Chennai")[0] and cache.get("Delhi")[0]
+    assert cache.get("Mumbai") == (False, None)
+
+
+def test_cache_follows_the_data_directory(make_fetcher, tmp_path):
+    geocoder = CountingGeocoder()
+    make_fetcher(["Chennai", "Mumbai"], "20200101", "20200105", geocoder=geocoder).fetch_and_process_weather()
+    make_fetcher(["Chennai", "Mumbai"], "20200101", "20200105", geocoder=geocoder).fetch_and_process_weather()
+
+    assert geocoder.queries == ["Chennai", "Mumbai"]
+    assert os.path.exists(tmp_path / "data" / "geocode_cache.sqlite")
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("P:")]
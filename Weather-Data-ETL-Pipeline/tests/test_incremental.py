@@ -0,0 +1,72 @@
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from conftest import output_path, read_output
+
+LOCATIONS = ["Chennai", "Mumbai", "Delhi"]
+
+
+def record_requests(fetcher, monkeypatch):
+    """Collects the (start, end) of every request the fetcher sends."""
+    requested = []
+    http_get = fetcher._http_get
+
+    def recording_http_get(url, **kwargs):
+        query = parse_qs(urlparse(url).query)
+        requested.append((query["start"][0], query["end"][0]))
+        return http_get(url, **kwargs)
+
+    monkeypatch.setattr(fetcher, "_http_get", recording_http_get)
+    return requested
+
+
+@pytest.mark.parametrize("output_format", ["csv", "feather", "parquet", "sqlite", "duckdb"])
+def test_incremental_run_fetches_only_missing_days(make_fetcher, monkeypatch, output_format):
+    if output_format in ("feather", "parquet"):
+        pytest.importorskip("pyarrow")
+    elif output_format == "duckdb":
+        pytest.importorskip("duckdb")
+
+    make_fetcher(LOCATIONS, "20200101", "20200131", max_workers=2,
+                 output_format=output_format).fetch_and_process_weather()
+
+    fetcher = make_fetcher(LOCATIONS, "20200115", "20200210", max_workers=2,
+                           output_format=output_format, incremental=True)
+    requested = record_requests(fetcher, monkeypatch)
+    fetcher.fetch_and_process_weather()
+
+    assert requested == [("20200201", "20200210")] * len(LOCATIONS)
+    sink = fetcher.create_sink()
+    if sink.run_files is None:
+        # Table and dataset sinks upsert, so the store now covers the whole second window
+        stored_df = sink.read_stored(pd.Timestamp("2020-01-15"), pd.Timestamp("2020-02-10"), LOCATIONS)
+        assert len(stored_df) == 27 * len(LOCATIONS)
+
+
+def test_incremental_output_matches_a_full_fetch(make_fetcher):
+    make_fetcher(LOCATIONS, "20200101", "20200131").fetch_and_process_weather()
+    incremental = make_fetcher(LOCATIONS, "20200115", "20200210", incremental=True)
+    incremental.fetch_and_process_weather()
+    incremental_df = read_output(incremental)
+
+    full = make_fetcher(LOCATIONS, "20200115", "20200210")
+    full.fetch_and_process_weather()
+
+    assert incremental_df.equals(read_output(full))
+
+
+def test_incremental_refetches_fill_values(make_fetcher, monkeypatch):
+    first = make_fetcher(LOCATIONS, "20200101", "20200131")
+    first.fetch_and_process_weather()
+    stored_df = read_output(first)
+    stored_df.loc[(stored_df["state"] == "Chennai") & (stored_df["date"] == "2020-01-20"), "Humidity"] = -999
+    stored_df.to_csv(output_path(first), index=False)
+
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", incremental=True)
+    requested = record_requests(fetcher, monkeypatch)
+    fetcher.fetch_and_process_weather()
+
+    assert requested == [("20200120", "20200120")]
+    assert (read_output(fetcher)["Humidity"] != -999).all()
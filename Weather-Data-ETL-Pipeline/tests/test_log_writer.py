@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+import time
+
+from weather_data_etl import BackgroundLogWriter
+
+
+def read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_flush_writes_every_thread_in_order(tmp_path):
+    writer = BackgroundLogWriter(batch_size=64, flush_interval=60)
+    paths = [str(tmp_path / "info.json"), str(tmp_path / "error.json")]
+
+    def log(thread):
+        for i in range(500):
+            writer.write(paths[i % 2], {"thread": thread, "i": i})
+
+    threads = [threading.Thread(target=log, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+
+    for parity, path in enumerate(paths):
+        entries = read_lines(path)
+        assert len(entries) == 8 * 250
+        for thread in range(8):
+            assert [entry["i"] for entry in entries if entry["thread"] == thread] == list(range(parity, 500, 2))
+    writer.close()
+
+
+def test_lines_are_written_once_a_batch_fills(tmp_path):
+    writer = BackgroundLogWriter(batch_size=3, flush_interval=60)
+    path = str(tmp_path / "info.json")
+    writer.write(path, {"i": 0})
+    writer.write(path, {"i": 1})
+    time.sleep(0.1)
+    assert read_lines(path) == []
+
+    writer.write(path, {"i": 2})
+    assert wait_for(lambda: len(read_lines(path)) == 3)
+    writer.close()
+
+
+def test_lines_are_written_after_the_flush_interval(tmp_path):
+    writer = BackgroundLogWriter(batch_size=1000, flush_interval=0.05)
+    path = str(tmp_path / "info.json")
+    writer.write(path, {"i": 0})
+
+    assert wait_for(lambda: read_lines(path) == [{"i": 0}])
+    writer.close()
+
+
+def test_close_writes_the_rest_and_later_lines_directly(tmp_path):
+    writer = BackgroundLogWriter(batch_size=1000, flush_interval=60)
+    path = str(tmp_path / "info.json")
+    writer.write(path, {"i": 0})
+    writer.close()
+
+    assert read_lines(path) == [{"i": 0}]
+    assert not writer._thread.is_alive()
+    writer.write(path, {"i": 1})
+    writer.flush()  # No-op once closed
+    assert read_lines(path) == [{"i": 0}, {"i": 1}]
+
+
+def test_fetchers_share_one_writer_thread(make_fetcher):
+    before = sum(thread.name == "log-writer" for thread in threading.enumerate())
+    fetchers = [make_fetcher(["Chennai"], "20200101", "20200105", log_batch_size=7, log_flush_interval=0.5)
+                for _ in range(10)]
+    for fetcher in fetchers:
+        fetcher.fetch_and_process_weather()
+
+    assert len({id(fetcher._log_writer) for fetcher in fetchers}) == 1
+    assert sum(thread.name == "log-writer" for thread in threading.enumerate()) <= before + 1
+    assert all(read_lines(fetcher.info_log_file) for fetcher in fetchers)
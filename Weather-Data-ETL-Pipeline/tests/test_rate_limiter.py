@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from weather_data_etl import RateLimitedGeocoder, RateLimiter, TokenBucket
+
+
+def test_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)  # Reservations queue up behind each other
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.reserve()
+    time.sleep(0.06)
+
+    assert bucket.reserve() == 0.0
+
+
+def test_unknown_hosts_are_not_limited():
+    limiter = RateLimiter({"power.larc.nasa.gov": (1, 1)})
+
+    assert [limiter.acquire("http://127.0.0.1:8765/api") for _ in range(5)] == [0.0] * 5
+    assert limiter.stats() == {"power.larc.nasa.gov": {"acquired": 0, "waited": 0, "wait_seconds": 0.0,
+                                                       "max_wait_seconds": 0.0}}
+
+
+def test_threads_share_one_bucket_per_host():
+    limiter = RateLimiter({"example.org": (50, 5)})
+    started = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire, args=("https://example.org/x",)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - started >= (20 - 5) / 50 * 0.9
+    stats = limiter.stats()["example.org"]
+    assert stats["acquired"] == 20 and stats["waited"] == 15
+
+
+def test_asyncio_tasks_wait_without_blocking_the_loop():
+    limiter = RateLimiter({"example.org": (50, 1)})
+
+    async def acquire_all():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire_async("https://example.org/x") for _ in range(10)))
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_all()) == pytest.approx(9 / 50, abs=0.05)
+
+
+def test_geocoder_lookups_take_a_token():
+    class Geocoder:
+        def geocode(self, query):
+            return query
+
+    limiter = RateLimiter({"nominatim.openstreetmap.org": (100, 1)})
+    geocoder = RateLimitedGeocoder(Geocoder(), limiter, "nominatim.openstreetmap.org")
+
+    assert [geocoder.geocode(name) for name in ("a", "b")] == ["a", "b"]
+    assert limiter.stats()["nominatim.openstreetmap.org"]["acquired"] == 2
+
+
+def test_fetcher_requests_are_rate_limited(make_fetcher):
+    fetcher = make_fetcher(["Chennai", "Mumbai", "Delhi", "Pune"], "20200101", "20200131",
+                           max_workers=4, rate_limits={"127.0.0.1": (20, 1)})
+    started = time.monotonic()
+    fetcher.fetch_and_process_weather()
+
+    assert time.monotonic() - started >= 3 / 20 * 0.9
+    assert fetcher.rate_limiter.stats()["127.0.0.1"]["acquired"] == 4
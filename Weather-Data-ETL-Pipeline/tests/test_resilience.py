@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from urllib.parse import parse_qs, urlparse
+
+from conftest import read_log, read_output
+from power_stub_server import PowerStubHandler
+from weather_data_etl import CircuitBreaker, RetryPolicy
+
+FAST_RETRIES = dict(max_attempts=3, base_delay=0.01, max_delay=0.01)
+
+
+class FlakyHandler(PowerStubHandler):
+    """Answers with the queued error statuses first, then like the regular stub."""
+
+    statuses = []
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.statuses:
+            self._send_json(self.statuses.pop(0), {"messages": ["Injected failure"]})
+            return
+        super().do_GET()
+
+
+@pytest.fixture
+def flaky():
+    handler = type("FlakyHandler", (FlakyHandler,), {"statuses": [], "hits": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    handler.url = f"http://127.0.0.1:{server.server_address[1]}/api/temporal/daily/point"
+    yield handler
+    server.shutdown()
+
+
+def test_transient_errors_are_retried(make_fetcher, flaky):
+    flaky.statuses[:] = [503, 503]
+    fetcher = make_fetcher(["Chennai"], "20200101", "20201231", base_url=flaky.url,
+                           retry_policy=RetryPolicy(**FAST_RETRIES))
+    fetcher.fetch_and_process_weather()
+
+    assert len(flaky.hits) == 3
+    assert fetcher.connection_stats()["retries"] == 2
+    assert len(read_output(fetcher)) == 366
+
+
+def test_transient_errors_are_retried_async(make_fetcher, flaky):
+    pytest.importorskip("aiohttp")
+    flaky.statuses[:] = [503]
+    fetcher = make_fetcher(["Chennai"], "20200101", "20201231", base_url=flaky.url,
+                           retry_policy=RetryPolicy(**FAST_RETRIES))
+    asyncio.run(fetcher.fetch_and_process_weather_async())
+
+    assert len(flaky.hits) == 2
+    assert len(read_output(fetcher)) == 366
+
+
+def test_client_errors_are_not_retried(make_fetcher, flaky):
+    flaky.statuses[:] = [422]
+    fetcher = make_fetcher(["Chennai"], "20200101", "20201231", base_url=flaky.url,
+                           retry_policy=RetryPolicy(**FAST_RETRIES))
+    fetcher.fetch_and_process_weather()
+    fetcher.flush_logs()
+
+    assert len(flaky.hits) == 1
+    assert fetcher.circuit_breaker.state == "closed"
+    assert any("422" in message for message in read_log(fetcher.error_log_file))
+
+
+@pytest.mark.parametrize("max_attempts, chunk_retries", [(3, 2), (1, 2)])
+def test_chunk_retries_do_not_multiply_http_retries(make_fetcher, flaky, max_attempts, chunk_retries):
+    flaky.statuses[:] = [503] * 100
+    fetcher = make_fetcher(["Chennai"], "20200101", "20200229", base_url=flaky.url, backfill_chunk="month",
+                           chunk_retries=chunk_retries, circuit_breaker=CircuitBreaker(failure_threshold=100),
+                           retry_policy=RetryPolicy(**dict(FAST_RETRIES, max_attempts=max_attempts)))
+    fetcher.fetch_and_process_weather()
+
+    # Two monthly chunks, each tried three times by whichever layer owns the retries
+    assert len(flaky.hits) == 2 * 3
+
+
+def test_open_circuit_stops_requests(make_fetcher, flaky):
+    flaky.statuses[:] = [503] * 100
+    fetcher = make_fetcher(["Chennai", "Mumbai", "Delhi", "Pune"], "20200101", "20200131", base_url=flaky.url,
+                           circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+                           retry_policy=RetryPolicy(**dict(FAST_RETRIES, max_attempts=1)))
+    fetcher.fetch_and_process_weather()
+    fetcher.flush_logs()
+
+    assert len(flaky.hits) == 2
+    assert fetcher.circuit_breaker.state == "open"
+    assert any("Circuit breaker is open" in message for message in read_log(fetcher.error_log_file))
+
+
+def test_failed_regional_box_loses_only_its_locations(make_fetcher, monkeypatch):
+    # Delhi falls in the 70-80 degree longitude tile, the other three in the 80-90 one
+    fetcher = make_fetcher(["Chennai", "Mumbai", "Delhi", "Pune"], "20200101", "20200131",
+                           extraction_mode="regional", retry_policy=RetryPolicy(**dict(FAST_RETRIES, max_attempts=1)))
+    http_get = fetcher._http_get
+
+    def failing_http_get(url, **kwargs):
+        if float(parse_qs(urlparse(url).query)["longitude-max"][0]) < 80:
+            raise requests.ConnectionError("connection reset")
+        return http_get(url, **kwargs)
+
+    monkeypatch.setattr(fetcher, "_http_get", failing_http_get)
+    fetcher.fetch_and_process_weather()
+    fetcher.flush_logs()
+
+    assert sorted(read_output(fetcher)["state"].unique()) == ["Chennai", "Mumbai", "Pune"]
+    errors = read_log(fetcher.error_log_file)
+    assert any("regional weather data for box" in message and "connection reset" in message for message in errors)
+    assert "No regional weather data for Delhi." in errors
+
+
+def test_half_open_breaker_admits_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # Everyone else waits for the trial
+
+    breaker.record_failure()  # A failed trial reopens the breaker
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_abandoned_trial_is_replaced_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()  # This trial never reports back
+
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
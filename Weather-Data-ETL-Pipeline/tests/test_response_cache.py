@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from conftest import read_output
+from power_stub_server import build_point_response
+from weather_data_etl import ResponseCache, decode_weather_payload, has_fill_values
+
+QUERY = {"parameters": "TMAX,TMIN,RH2M,PRECTOTCORR,WS2M", "longitude": "80.25", "latitude": "13.0"}
+
+
+def power_body(start, end, fill_day=None):
+    """A POWER-shaped response body, with -999 on fill_day if given."""
+    payload = build_point_response(dict(QUERY, start=start, end=end))
+    if fill_day:
+        payload["properties"]["parameter"]["RH2M"][fill_day] = -999.0
+    return json.dumps(payload).encode("utf-8")
+
+
+def stored_expiry(cache, url):
+    with gzip.open(cache._path(url), "rb") as f:
+        return json.loads(f.readline())["expires"]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "http_cache"))
+
+
+def test_fill_values_are_found_in_decoded_values_not_the_header():
+    clean = power_body("20100101", "20101231")
+    assert b'"fill_value": -999.0' in clean
+    assert not has_fill_values(decode_weather_payload(clean))
+    assert has_fill_values(decode_weather_payload(power_body("20100101", "20101231", fill_day="20100615")))
+
+
+def test_historical_ranges_never_expire(cache):
+    body = power_body("20100101", "20101231")
+    cache.put("old", "20101231", body, has_fill_values(decode_weather_payload(body)))
+
+    assert stored_expiry(cache, "old") is None
+    assert cache.get("old") == body
+
+
+def test_historical_ranges_with_fill_values_expire(cache):
+    body = power_body("20100101", "20101231", fill_day="20100615")
+    cache.put("old", "20101231", body, has_fill_values(decode_weather_payload(body)))
+
+    assert stored_expiry(cache, "old") is not None
+
+
+def test_recent_ranges_expire(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache"), recent_ttl_hours=0)
+    cache.put("recent", "29991231", b"{}")
+
+    assert stored_expiry(cache, "recent") is not None
+    assert cache.get("recent") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    body = power_body("20100101", "20101231")
+    cache = ResponseCache(str(tmp_path / "http_cache"))
+    cache.put("probe", "20101231", body)
+    entry_size = cache.stats()["bytes"]
+    os.remove(cache._path("probe"))
+
+    cache = ResponseCache(str(tmp_path / "http_cache"), max_bytes=int(entry_size * 2.5))
+    cache.put("a", "20101231", body)
+    cache.put("b", "20101231", body)
+    past = time.time() - 60
+    os.utime(cache._path("b"), (past, past))  # "a" was read more recently
+    cache.put("c", "20101231", body)
+
+    assert cache.get("a") == body and cache.get("c") == body
+    assert cache.get("b") is None
+
+
+def test_runs_are_served_from_the_cache_under_the_data_directory(make_fetcher, tmp_path):
+    first = make_fetcher(["Chennai", "Mumbai"], "20100101", "20101231", response_cache=True)
+    first.fetch_and_process_weather()
+    second = make_fetcher(["Chennai", "Mumbai"], "20100101", "20101231", response_cache=True)
+    second.fetch_and_process_weather()
+
+    assert first.connection_stats()["requests"] == 2
+    assert second.connection_stats()["requests"] == 0
+    assert read_output(second).equals(read_output(first))
+    assert os.path.isdir(tmp_path / "data" / "http_cache")
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("P:")]
@@ -0,0 +1,115 @@
+import gzip
+import io
+import os
+from datetime import datetime
+
+import boto3
+import pandas as pd
+import pytest
+
+import weather_data_etl
+from conftest import read_log, read_output
+from weather_data_etl import S3MultipartWriter
+
+moto = pytest.importorskip("moto")
+
+BUCKET = "weather-test-bucket"
+LOCATIONS = ["Chennai", "Mumbai", "Delhi"]
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """A moto-backed bucket; the repository's .env is never read."""
+    monkeypatch.setattr(weather_data_etl, "_dotenv_loaded", True)
+    monkeypatch.setattr(weather_data_etl, "_s3_clients", {})
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    monkeypatch.setenv("S3_BUCKET_NAME", BUCKET)
+    monkeypatch.delenv("S3_ENDPOINT_URL", raising=False)
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def object_keys(s3):
+    return [entry["Key"] for entry in s3.list_objects_v2(Bucket=BUCKET).get("Contents", [])]
+
+
+def read_object_csv(s3, key):
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    output_df = pd.read_csv(io.BytesIO(gzip.decompress(body)))
+    return output_df.sort_values(["state", "date"], ignore_index=True)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_direct_upload_matches_local_output(make_fetcher, s3, streaming):
+    local = make_fetcher(LOCATIONS, "20200101", "20201231")
+    local.fetch_and_process_weather()
+
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20201231", upload=True, direct_upload=True,
+                           streaming=streaming, max_workers=2)
+    fetcher.fetch_and_process_weather()
+
+    keys = object_keys(s3)
+    assert len(keys) == 1 and keys[0].endswith("/weather_data_20200101_20201231.csv.gz")
+    assert read_object_csv(s3, keys[0]).equals(read_output(local))
+    assert s3.head_object(Bucket=BUCKET, Key=keys[0])["ContentEncoding"] == "gzip"
+
+
+def test_failed_streaming_direct_upload_is_aborted(make_fetcher, s3, monkeypatch):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", upload=True, direct_upload=True, streaming=True)
+    output_frame = fetcher._output_frame
+    calls = []
+
+    def failing_output_frame(weather_df):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("serialization failed")
+        return output_frame(weather_df)
+
+    monkeypatch.setattr(fetcher, "_output_frame", failing_output_frame)
+    fetcher.fetch_and_process_weather()
+
+    assert object_keys(s3) == []
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+def test_multipart_writer_abort_discards_sent_parts(s3):
+    writer = S3MultipartWriter(s3, BUCKET, "aborted.bin", part_size=S3MultipartWriter.MIN_PART_SIZE)
+    writer.write(os.urandom(S3MultipartWriter.MIN_PART_SIZE + 1024))  # One full part goes out
+    writer._parts[0].result()
+    writer.abort()
+
+    assert object_keys(s3) == []
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+def test_unchanged_files_are_not_uploaded_again(make_fetcher, s3):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", upload=True, upload_compression="gzip")
+    fetcher.fetch_and_process_weather()
+    fetcher.fetch_and_process_weather()
+    fetcher.flush_logs()
+
+    keys = object_keys(s3)
+    assert len(keys) == 1 and keys[0].endswith(".csv.gz")
+    assert read_object_csv(s3, keys[0]).equals(read_output(fetcher))
+    summaries = [message for message in read_log(fetcher.info_log_file) if message.startswith("S3 upload:")]
+    assert summaries[0].startswith("S3 upload: 1 files uploaded, 0 unchanged")
+    assert summaries[-1].startswith("S3 upload: 0 files uploaded, 1 unchanged")
+
+
+def test_default_upload_takes_only_finished_run_outputs(make_fetcher, s3):
+    fetcher = make_fetcher(LOCATIONS, "20200101", "20200131", upload=True)
+    today_folder = os.path.join(fetcher.data_directory, datetime.now().strftime("%Y-%m-%d"))
+    os.makedirs(today_folder)
+    for name in ("weather_data_20200101_20200131.csv", "weather_data_20200201_20200229.csv.gz",
+                 "weather_data_20200301_20200331.feather", "weather_data_20200401_20200430.csv.tmp", "notes.txt"):
+        with open(os.path.join(today_folder, name), "w") as f:
+            f.write(name)
+    fetcher.upload_csv_to_s3()
+
+    assert sorted(key.split("/")[-1] for key in object_keys(s3)) == [
+        "weather_data_20200101_20200131.csv", "weather_data_20200201_20200229.csv.gz",
+        "weather_data_20200301_20200331.feather"]
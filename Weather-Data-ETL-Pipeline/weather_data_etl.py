@@ -1,24 +1,1355 @@
 import os
+import asyncio
+import atexit
+import difflib
+import fnmatch
+import glob
+import gzip
+import hashlib
+import io
 import requests
+import numpy as np
 import pandas as pd
 import boto3
 import json
-from datetime import datetime
+import queue
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from urllib.parse import quote, urlparse
+from boto3.s3.transfer import TransferConfig
+from geopy.adapters import RequestsAdapter
 from geopy.geocoders import Nominatim
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp  # Optional, only needed for the asyncio engine
+except ImportError:
+    aiohttp = None
+
+try:
+    import pyarrow as pa  # Optional, only needed for Parquet output
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+try:
+    import duckdb  # Optional, only needed for DuckDB output
+except ImportError:
+    duckdb = None
+
+try:
+    import zstandard  # Optional, only needed for zstd upload compression
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson  # Optional, faster JSON decoding
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+class WeatherSeries:
+    """Decoded POWER point payload: one datetime64[D] array and one float64 array per parameter."""
+
+    __slots__ = ("dates", "values")
+
+    def __init__(self, dates, values):
+        self.dates = dates
+        self.values = values
+
+
+def _yyyymmdd_to_days(numbers):
+    """Converts YYYYMMDD integers to datetime64[D]."""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    months = (numbers // 10000 - 1970) * 12 + (numbers // 100 % 100 - 1)
+    return months.astype('datetime64[M]').astype('datetime64[D]') + (numbers % 100 - 1).astype('timedelta64[D]')
+
+
+def parse_power_dates(keys):
+    """Converts POWER YYYYMMDD date keys to datetime64[D].
+
+    POWER answers with every day of the requested range in order, so when the first
+    and last keys span exactly len(keys) days the dates are generated with arange
+    instead of parsing each key.
+    """
+    if not keys:
+        return np.array([], dtype='datetime64[D]')
+    first, last = _yyyymmdd_to_days([int(keys[0]), int(keys[-1])])
+    if (last - first).astype(int) + 1 == len(keys):
+        return np.arange(first, last + 1, dtype='datetime64[D]')
+    return _yyyymmdd_to_days(np.fromiter(map(int, keys), dtype=np.int64, count=len(keys)))
+
+
+def records_to_series(records, release=False):
+    """Converts POWER parameter records ({name: {YYYYMMDD: value}}) to a WeatherSeries.
+
+    With release=True each mapping is removed from records once converted.
+    """
+    keys = list(next(iter(records.values())))
+    values = {}
+    for name in list(records):
+        series = records.pop(name) if release else records[name]
+        if list(series) == keys:
+            values[name] = np.fromiter(series.values(), dtype=np.float64, count=len(keys))
+        else:
+            # Parameters normally share the same days; align them by key if they do not
+            values[name] = np.fromiter((series.get(key, np.nan) for key in keys), dtype=np.float64, count=len(keys))
+    return WeatherSeries(parse_power_dates(keys), values)
+
+
+def decode_weather_payload(content):
+    """Decodes a POWER point response body straight into a WeatherSeries.
+
+    Each parameter's date->value mapping is converted to a typed array and released
+    before the next one, so the decoded payload never holds two copies of a series.
+    Payloads without parameter records are returned as plain dicts.
+    """
+    payload = json_loads(content)
+    records = payload.get('properties', {}).get('parameter', {}) if isinstance(payload, dict) else None
+    if not records:
+        return payload
+    return records_to_series(records, release=True)
+
+
+def has_fill_values(payload):
+    """True if a decoded payload holds POWER's -999 fill value for a day it has no data for yet."""
+    if not isinstance(payload, WeatherSeries):
+        return False
+    return any((values == -999).any() for values in payload.values.values())
+
+
+class GeocodeCache:
+    """SQLite-backed cache of geocoding results keyed by normalized location name."""
+
+    def __init__(self, path, ttl_days=365, negative_ttl_days=7, max_entries=100000):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400  # "Not found" answers expire sooner
+        self.max_entries = max_entries
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(location):
+        """Returns the cache key for a location name."""
+        return " ".join(str(location).lower().split())
+
+    def _connect(self):
+        """Opens the database on first use; callers hold the lock."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "key TEXT PRIMARY KEY, longitude REAL, latitude REAL, found INTEGER, created REAL, accessed REAL)"
+            )
+        return self._conn
+
+    def get(self, location):
+        """Returns (hit, coordinates); coordinates is None for a cached "not found"."""
+        key = self.normalize(location)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT longitude, latitude, found, created FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+
+            longitude, latitude, found, created = row
+            if now - created > (self.ttl if found else self.negative_ttl):
+                conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                conn.commit()
+                self.misses += 1
+                return False, None
+
+            conn.execute("UPDATE geocode SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            if found:
+                self.hits += 1
+                return True, (longitude, latitude)
+            self.negative_hits += 1
+            return True, None
+
+    def put(self, location, coordinates):
+        """Stores (longitude, latitude), or None for a location that was not found."""
+        longitude, latitude = coordinates if coordinates else (None, None)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)",
+                (self.normalize(location), longitude, latitude, int(coordinates is not None), now, now)
+            )
+            # Evict the least recently used entries beyond the size limit
+            conn.execute(
+                "DELETE FROM geocode WHERE key IN "
+                "(SELECT key FROM geocode ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters for this process."""
+        return {"hits": self.hits, "negative_hits": self.negative_hits, "misses": self.misses}
+
+
+# Geocoding result with the same attributes geopy's Location exposes
+GeoPoint = namedtuple("GeoPoint", ["address", "latitude", "longitude"])
+
+
+class GazetteerGeocoder:
+    """Offline geocoder backed by a GeoNames-style gazetteer file.
+
+    The tab-separated file (geonameid, name, asciiname, alternatenames, latitude,
+    longitude, feature class, feature code, country code, cc2, admin1 code, ...,
+    population) is compiled once into sorted NumPy arrays next to it and memory-mapped
+    on load, so lookups are a binary search without network access. Every place is
+    kept, most populous first, so "City, Qualifier" queries can pick the homonym in the
+    named country or first-level division.
+    """
+
+    FUZZY_WINDOW = 64  # Names scored on each side of the insertion point of a fuzzy lookup
+    INDEX_VERSION = 2  # Bumped whenever the index layout changes
+
+    def __init__(self, path, index_directory=None, include_alternate_names=False, fuzzy_cutoff=0.85):
+        self.path = path
+        self.index_directory = index_directory or f"{path}.index"
+        self.include_alternate_names = include_alternate_names
+        self.fuzzy_cutoff = fuzzy_cutoff  # Similarity needed for a fuzzy match (0 disables it); 0.85 allows one typo in 7+ letters
+        if self._index_is_stale():
+            self._build_index()
+        self._load_index()
+
+    @staticmethod
+    def normalize(name):
+        """Returns the lookup key for a place name."""
+        return " ".join(str(name).lower().split())
+
+    def _index_meta(self):
+        """The build options an index must have been built with to be reused."""
+        return {"version": self.INDEX_VERSION, "include_alternate_names": self.include_alternate_names}
+
+    def _index_is_stale(self):
+        """True when the index is missing, older than the gazetteer file or built with other options."""
+        marker = os.path.join(self.index_directory, "meta.json")
+        try:
+            with open(marker, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return True
+        return meta != self._index_meta() or os.path.getmtime(marker) < os.path.getmtime(self.path)
+
+    def _build_index(self):
+        """Compiles the gazetteer into sorted key, coordinate, population and region arrays."""
+        entries = []  # (key, -population, latitude, longitude, country code, admin1 code)
+        regions = {}  # Country and first-level division names -> [(country code, admin1 code or "")]
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                columns = line.rstrip("\n").split("\t")
+                if len(columns) < 15:
+                    continue
+                try:
+                    latitude, longitude = float(columns[4]), float(columns[5])
+                    population = int(columns[14] or 0)
+                except ValueError:
+                    continue
+
+                names = {columns[1], columns[2]}
+                if self.include_alternate_names and columns[3]:
+                    names.update(columns[3].split(","))
+                keys = {self.normalize(name) for name in names} - {""}
+                country, admin1 = columns[8], columns[10]
+                for key in keys:
+                    entries.append((key, -population, latitude, longitude, country, admin1))
+
+                # Countries (PCLI, PCLD, ...) and states/provinces (ADM1) name the regions qualifiers refer to
+                if columns[7].startswith("PCL") or columns[7] == "ADM1":
+                    region = [country, admin1 if columns[7] == "ADM1" else ""]
+                    for key in keys | {self.normalize(name) for name in columns[3].split(",") if name}:
+                        if region not in regions.setdefault(key, []):
+                            regions[key].append(region)
+
+        # Most populous homonym first; code point order of str matches byte order of UTF-8, so the blob stays sorted
+        entries.sort()
+        encoded = [entry[0].encode("utf-8") for entry in entries]
+        offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(key) for key in encoded])
+
+        os.makedirs(self.index_directory, exist_ok=True)
+        save = lambda name, array: np.save(os.path.join(self.index_directory, f"{name}.npy"), array)
+        save("names", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        save("offsets", offsets)
+        save("coordinates", np.array([entry[2:4] for entry in entries], dtype=np.float64).reshape(-1, 2))
+        save("population", np.array([-entry[1] for entry in entries], dtype=np.int64))
+        save("countries", np.array([entry[4] for entry in entries], dtype="S2"))
+        save("admin1", np.array([entry[5] for entry in entries], dtype="S20"))
+        with open(os.path.join(self.index_directory, "regions.json"), "w", encoding="utf-8") as f:
+            json.dump(regions, f)
+        # Written last: its presence marks a complete index built with these options
+        with open(os.path.join(self.index_directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self._index_meta(), f)
+
+    def _load_index(self):
+        """Memory-maps the compiled index."""
+        load = lambda name: np.load(os.path.join(self.index_directory, f"{name}.npy"), mmap_mode="r")
+        self._names = load("names")
+        self._offsets = load("offsets")
+        self._coordinates = load("coordinates")
+        self._population = load("population")
+        self._countries = load("countries")
+        self._admin1 = load("admin1")
+        with open(os.path.join(self.index_directory, "regions.json"), encoding="utf-8") as f:
+            self._regions = {key: {tuple(region) for region in value} for key, value in json.load(f).items()}
+        self.size = len(self._offsets) - 1
+
+    def _key_at(self, i):
+        return bytes(self._names[self._offsets[i]:self._offsets[i + 1]])
+
+    def _bisect(self, key):
+        """Returns the first index whose key is >= key."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix_range(self, prefix, limit):
+        """Returns the indices of up to `limit` keys starting with prefix."""
+        start = self._bisect(prefix)
+        indices = []
+        for i in range(start, min(start + limit, self.size)):
+            if not self._key_at(i).startswith(prefix):
+                break
+            indices.append(i)
+        return indices
+
+    def _point(self, i):
+        latitude, longitude = self._coordinates[i]
+        return GeoPoint(self._key_at(i).decode("utf-8"), float(latitude), float(longitude))
+
+    def search_prefix(self, prefix, limit=10):
+        """Returns places whose name starts with prefix, most populous first."""
+        indices = self._prefix_range(self.normalize(prefix).encode("utf-8"), limit=1000)
+        indices.sort(key=lambda i: -int(self._population[i]))
+        return [self._point(i) for i in indices[:limit]]
+
+    def _in_region(self, i, qualifier):
+        """True if place i lies in the country or division a qualifier names, by name or code."""
+        country, admin1 = self._countries[i].decode("utf-8"), self._admin1[i].decode("utf-8")
+        if qualifier in (country.lower(), admin1.lower()):
+            return True
+        regions = self._regions.get(qualifier, ())
+        return (country, "") in regions or (country, admin1) in regions
+
+    def _first_match(self, i, qualifiers):
+        """Returns the most populous place named like index i that satisfies every qualifier."""
+        key = self._key_at(i)
+        while i < self.size and self._key_at(i) == key:
+            if all(self._in_region(i, qualifier) for qualifier in qualifiers):
+                return self._point(i)
+            i += 1
+        return None
+
+    def _lookup(self, key, qualifiers=()):
+        """Exact lookup, then a fuzzy match among the neighbouring names sharing the first two characters."""
+        encoded = key.encode("utf-8")
+        i = self._bisect(encoded)
+        if i < self.size and self._key_at(i) == encoded:
+            return self._first_match(i, qualifiers)
+
+        if self.fuzzy_cutoff and len(key) >= 3:
+            # A misspelling sorts close to the name it was meant to be, so only a window around i is scored
+            window = range(max(i - self.FUZZY_WINDOW, 0), min(i + self.FUZZY_WINDOW, self.size))
+            candidates = {self._key_at(j) for j in window}
+            candidates = [name.decode("utf-8") for name in candidates if name.startswith(encoded[:2])]
+            match = difflib.get_close_matches(key, candidates, n=1, cutoff=self.fuzzy_cutoff)
+            if match:
+                return self._first_match(self._bisect(match[0].encode("utf-8")), qualifiers)
+        return None
+
+    def geocode(self, query):
+        """Resolves a place name; in "City, Qualifier" the qualifier must name the place's country or division.
+
+        Qualified names with no matching homonym return None, so a chained geocoder can try them.
+        """
+        key = self.normalize(query)
+        if not key:
+            return None
+        result = self._lookup(key)
+        if result is None and "," in key:
+            city, *qualifiers = [part.strip() for part in key.split(",")]
+            result = self._lookup(city, [qualifier for qualifier in qualifiers if qualifier])
+        return result
+
+
+class ChainedGeocoder:
+    """Tries each geocoder in order and returns the first match."""
+
+    def __init__(self, geocoders):
+        self.geocoders = list(geocoders)
+
+    def geocode(self, query):
+        for geocoder in self.geocoders:
+            result = geocoder.geocode(query)
+            if result:
+                return result
+        return None
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of API response bodies, addressed by request hash.
+
+    Responses whose date range ended more than `immutable_after_days` ago never expire;
+    more recent ranges may still be revised upstream and expire after `recent_ttl_hours`,
+    and so do old ranges that still contain POWER's -999 fill value.
+    The least recently used files are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, recent_ttl_hours=6, immutable_after_days=30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.recent_ttl = recent_ttl_hours * 3600
+        self.immutable_after_days = immutable_after_days
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None  # Computed on first write
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def _is_immutable(self, end_date):
+        cutoff = datetime.now() - timedelta(days=self.immutable_after_days)
+        return datetime.strptime(str(end_date), "%Y%m%d") < cutoff
+
+    def get(self, url):
+        """Returns the cached body for url, or None when missing or expired."""
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["expires"] is not None and header["expires"] < time.time():
+                    raise FileNotFoundError(path)
+                content = f.read()
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, url, end_date, content, has_fill_values=False):
+        """Stores a response body fetched for a range ending on end_date.
+
+        has_fill_values says whether the decoded values contain -999; the raw body cannot
+        tell, since every POWER response carries "fill_value": -999.0 in its header.
+        """
+        # Days POWER has no data for yet are fetched again later, so such answers must expire
+        immutable = self._is_immutable(end_date) and not has_fill_values
+        expires = None if immutable else time.time() + self.recent_ttl
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wb") as f:
+            f.write(json.dumps({"url": url, "expires": expires}).encode("utf-8") + b"\n")
+            f.write(content)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(path) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Yields (path, size, last_used) for every cached file."""
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith(".json.gz"):
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Removes the least recently used files until the cache is back under 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        """Returns hit/miss counters for this process."""
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes}
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token and returns how long the caller must wait before using it.
+
+        Tokens may go negative: each caller reserves its slot under the lock and then
+        sleeps outside it, so threads and asyncio tasks never block each other.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every worker thread and asyncio task."""
+
+    DEFAULT_RATES = {
+        "power.larc.nasa.gov": (5, 10),  # (requests per second, burst)
+        "nominatim.openstreetmap.org": (1, 1)  # Nominatim usage policy: at most 1 request per second
+    }
+
+    def __init__(self, rates=None):
+        self.rates = dict(self.DEFAULT_RATES if rates is None else rates)
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in self.rates.items()}
+        self._stats = {host: {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+                       for host in self._buckets}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url_or_host):
+        return urlparse(url_or_host).hostname or url_or_host
+
+    def _reserve(self, url_or_host):
+        """Reserves a token for the host and returns the wait; unknown hosts are not limited."""
+        host = self.host_of(url_or_host)
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        with self._lock:
+            stats = self._stats[host]
+            stats["acquired"] += 1
+            if wait:
+                stats["waited"] += 1
+                stats["wait_seconds"] += wait
+                stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+        return wait
+
+    def acquire(self, url_or_host):
+        """Blocks the calling thread until a request to the host is allowed; returns the wait."""
+        wait = self._reserve(url_or_host)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_host):
+        """Async variant of acquire that yields to the event loop while waiting."""
+        wait = self._reserve(url_or_host)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self):
+        """Returns per-host acquisition and wait-time counters."""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+
+class RateLimitedGeocoder:
+    """Wraps a geocoder so every lookup takes a token from the rate limiter."""
+
+    def __init__(self, geocoder, rate_limiter, host):
+        self.geocoder = geocoder
+        self.rate_limiter = rate_limiter
+        self.host = host
+
+    def geocode(self, query):
+        self.rate_limiter.acquire(self.host)
+        return self.geocoder.geocode(query)
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker refuses a request."""
+
+
+class PowerRequestError(Exception):
+    """Raised when POWER answers a request with a non-200 status."""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryPolicy:
+    """Retry settings for API calls: exponential backoff with full jitter, honoring Retry-After."""
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, status_code):
+        return status_code is None or status_code in self.RETRY_STATUS_CODES
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt; Retry-After wins over the backoff."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Parses a Retry-After header given in seconds or as an HTTP date."""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """Stops sending requests after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds the breaker lets a single trial request through and
+    refuses every other caller until that trial is recorded; a success closes it again,
+    a failure keeps it open for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            # A trial that never reported back (e.g. a cancelled task) is replaced after reset_timeout
+            if self.state == "half-open" and (not self._trial_in_flight
+                                              or now - self._trial_started >= self.reset_timeout):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class OutputSink:
+    """Output backend for merged weather data.
+
+    write() receives the merged frame with datetime dates, the run's date folder and a
+    file name stem, and returns the path of what it wrote. open_stream() returns a
+    writer that accepts the same frames piece by piece; by default every piece is
+    written (upserted) on its own.
+    """
+
+    # Glob (below the data directory's date folders) of the files a per-run sink writes;
+    # None for sinks that keep one store and answer read_stored() instead
+    run_files = None
+
+    def write(self, weather_df, folder, name):
+        raise NotImplementedError
+
+    def open_stream(self, folder, name):
+        return _SinkStream(self, folder, name)
+
+    def read_stored(self, start, end, states):
+        """Returns the stored rows for `states` between the start and end datetimes (for incremental runs)."""
+        raise NotImplementedError(f"{type(self).__name__} cannot read back stored rows")
+
+
+class _SinkStream:
+    """Stream writer for sinks that upsert: each piece is a separate write()."""
+
+    def __init__(self, sink, folder, name):
+        self.sink = sink
+        self.folder = folder
+        self.name = name
+        self.path = None
+
+    def write(self, weather_df):
+        self.path = self.sink.write(weather_df, self.folder, self.name)
+
+    def close(self):
+        return self.path
+
+    abort = close
+
+
+class _CsvStream:
+    """Appends pieces to one CSV file; compressed pieces become concatenated members/frames.
+
+    Pieces go to `<path>.tmp`, which replaces the final file on close(), so an interrupted
+    run never leaves a truncated file where incremental runs look for stored data.
+    """
+
+    def __init__(self, path, compression):
+        self.path = path
+        self.compression = compression
+        self.handle = None
+
+    def write(self, weather_df):
+        header = self.handle is None
+        if header:
+            self.handle = open(f"{self.path}.tmp", 'wb')  # Opened on the first piece, so an empty run leaves no file
+        weather_df.to_csv(self.handle, index=False, header=header, compression=self.compression)
+
+    def close(self):
+        if self.handle is None:
+            return None
+        self.handle.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        return self.path
+
+    def abort(self):
+        if self.handle is not None:
+            self.handle.close()
+            os.remove(f"{self.path}.tmp")
+
+
+class _FeatherStream:
+    """Appends pieces as record batches to one Arrow IPC file, written under `<path>.tmp` until close()."""
+
+    def __init__(self, path, compression):
+        self.path = path
+        self.compression = compression
+        self.writer = None
+
+    def write(self, weather_df):
+        # Every batch must share one schema, so state is written as plain strings
+        table = pa.Table.from_pandas(weather_df.assign(state=weather_df['state'].astype(str)), preserve_index=False)
+        if self.writer is None:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self.writer = pa.ipc.new_file(f"{self.path}.tmp", table.schema, options=options)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            return None
+        self.writer.close()
+        os.replace(f"{self.path}.tmp", self.path)
+        return self.path
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.remove(f"{self.path}.tmp")
+
+
+_dotenv_loaded = False
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def load_environment():
+    """Loads the .env file into the environment once per process."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+def get_s3_client(aws_access_key_id, aws_secret_access_key, region_name, endpoint_url=None):
+    """Returns the process-wide S3 client for these settings, building it on first use.
+
+    Building a client loads botocore's service models, which is slow; clients are
+    thread-safe, so one per settings is shared by every thread. The process id is part of
+    the key so forked workers build their own.
+    """
+    key = (os.getpid(), aws_access_key_id, aws_secret_access_key, region_name, endpoint_url)
+    with _s3_clients_lock:
+        s3 = _s3_clients.get(key)
+        if s3 is None:
+            s3 = _s3_clients[key] = boto3.client(
+                's3',
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                region_name=region_name,
+                endpoint_url=endpoint_url
+            )
+        return s3
+
+
+UPLOAD_CODECS = {"gzip": ".gz", "zstd": ".zst"}
+# Formats that are compressed already and gain nothing from another pass
+COMPRESSED_SUFFIXES = (".gz", ".zst", ".bz2", ".xz", ".zip", ".parquet", ".feather")
+CONTENT_TYPES = {
+    ".csv": "text/csv", ".json": "application/json", ".parquet": "application/vnd.apache.parquet",
+    ".feather": "application/vnd.apache.arrow.file", ".sqlite": "application/vnd.sqlite3"
+}
+CONTENT_ENCODINGS = {".gz": "gzip", ".zst": "zstd", ".bz2": "bzip2", ".xz": "xz"}
+
+
+def open_compressor(fileobj, codec, level=None, threads=-1):
+    """Returns a binary writer compressing into `fileobj` with gzip or zstd; closing it leaves `fileobj` open.
+
+    zstd compresses with `threads` worker threads (-1 = one per core); gzip is single-threaded.
+    """
+    if codec == 'gzip':
+        # mtime=0 keeps the output identical for identical input
+        return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6 if level is None else level, mtime=0)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd compression requires zstandard (pip install zstandard)")
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level, threads=threads)
+        return compressor.stream_writer(fileobj, closefd=False)
+    raise ValueError(f"Unknown upload compression: {codec}")
+
+
+def s3_content_metadata(key):
+    """Returns the ContentType/ContentEncoding upload arguments for an S3 key, from its extensions."""
+    stem, extension = os.path.splitext(key)
+    extra_args = {}
+    if extension in CONTENT_ENCODINGS:
+        extra_args["ContentEncoding"] = CONTENT_ENCODINGS[extension]
+        stem, extension = os.path.splitext(stem)
+    extra_args["ContentType"] = CONTENT_TYPES.get(extension, "application/octet-stream")
+    return extra_args
+
+
+class S3MultipartWriter:
+    """Binary file-like object that sends whatever is written to S3 as a multipart upload.
+
+    Data is buffered into parts of `part_size` bytes (at least 5 MB, the S3 minimum) and
+    up to `concurrency` parts are uploaded at once, so memory stays bounded by
+    part_size * concurrency whatever the object size.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, s3, bucket_name, key, part_size=8 * 1024 * 1024, concurrency=4, extra_args=None):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.concurrency = max(concurrency, 1)
+        self.size = 0
+        self.md5 = hashlib.md5()
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._buffer = bytearray()
+        self._parts = []
+        self._in_flight = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=key, **(extra_args or {}))['UploadId']
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        self._buffer += data
+        self.size += len(data)
+        self.md5.update(data)
+        while len(self._buffer) >= self.part_size:
+            self._send_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _send_part(self, body):
+        # Wait for the oldest part once `concurrency` are in flight, to bound memory
+        if len(self._in_flight) >= self.concurrency:
+            self._in_flight.popleft().result()
+        future = self._executor.submit(self._upload_part, len(self._parts) + 1, body)
+        self._parts.append(future)
+        self._in_flight.append(future)
+
+    def _upload_part(self, part_number, body):
+        response = self.s3.upload_part(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                                       PartNumber=part_number, Body=body)
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def close(self):
+        """Uploads the last part and completes the upload."""
+        try:
+            if self._buffer or not self._parts:
+                self._send_part(bytes(self._buffer))
+                self._buffer.clear()
+            parts = [future.result() for future in self._parts]
+            self.s3.complete_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id,
+                                              MultipartUpload={"Parts": parts})
+            self.elapsed = time.perf_counter() - self.started
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown()
+
+    def abort(self):
+        """Cancels the upload so S3 does not keep the parts sent so far."""
+        self._executor.shutdown(cancel_futures=True)
+        self.s3.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+
+
+class _S3CsvStream:
+    """Writes CSV pieces through a compressor straight into an S3 multipart upload, with no local file."""
+
+    def __init__(self, writer, compressor):
+        self.writer = writer
+        self.handle = io.TextIOWrapper(compressor, encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, weather_df):
+        weather_df.to_csv(self.handle, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            self.abort()  # Nothing was written, so no object is created
+            return None
+        self.handle.close()  # Ends the compressed stream; the S3 writer stays open
+        self.writer.close()
+        return f"s3://{self.writer.bucket_name}/{self.writer.key}"
+
+    def abort(self):
+        self.writer.abort()
+
+
+class CsvSink(OutputSink):
+    """One CSV file per run, optionally compressed ('gzip', 'bz2', 'xz' or 'zstd')."""
+
+    run_files = "weather_data_*.csv*"
+
+    EXTENSIONS = {None: "", "gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zstd": ".zst"}
+
+    def __init__(self, compression=None):
+        self.compression = compression
+
+    def _path(self, folder, name):
+        return os.path.join(folder, f"{name}.csv{self.EXTENSIONS[self.compression]}")
+
+    def write(self, weather_df, folder, name):
+        file_path = self._path(folder, name)
+        weather_df.to_csv(file_path, index=False, compression=self.compression)
+        return file_path
+
+    def open_stream(self, folder, name):
+        return _CsvStream(self._path(folder, name), self.compression)
+
+
+class ParquetSink(OutputSink):
+    """Upserts rows into a Hive-partitioned Parquet dataset (state=/year=/month=).
+
+    Each touched partition is rewritten as one file holding its existing rows plus
+    the new ones (new rows win per date), so overlapping runs never lose data.
+    """
+
+    def __init__(self, dataset_root, compression='snappy'):
+        if pq is None:
+            raise ImportError("Parquet output requires the 'pyarrow' package.")
+        self.dataset_root = dataset_root
+        self.compression = compression
+
+    def write(self, weather_df, folder, name):
+        dates = weather_df['date'].dt
+        for (state, year, month), partition_df in weather_df.groupby(
+                [weather_df['state'], dates.year, dates.month], sort=False, observed=True):
+            partition_dir = os.path.join(self.dataset_root, f"state={quote(str(state), safe='')}",
+                                         f"year={year}", f"month={month}")
+            file_path = os.path.join(partition_dir, "part-0.parquet")
+
+            # Partition columns live in the path, not in the file
+            table = pa.Table.from_pandas(partition_df.drop(columns=['state']), preserve_index=False)
+            table = table.set_column(0, 'date', table.column('date').cast(pa.date32()))
+            if os.path.exists(file_path):
+                existing = pq.read_table(file_path)
+                replaced = pc.is_in(existing.column('date'), value_set=table.column('date'))
+                table = pa.concat_tables([existing.filter(pc.invert(replaced)), table.cast(existing.schema)])
+            table = table.sort_by('date')
+
+            os.makedirs(partition_dir, exist_ok=True)
+            temp_path = f"{file_path}.tmp"
+            pq.write_table(table, temp_path, compression=self.compression, write_statistics=True)
+            os.replace(temp_path, file_path)
+
+        return self.dataset_root
+
+    def read_stored(self, start, end, states):
+        if not os.path.isdir(self.dataset_root):
+            return pd.DataFrame()
+        # Partition pruning on state and row-group statistics on date keep this to the needed files
+        table = pq.read_table(self.dataset_root, filters=[
+            ('state', 'in', [str(state) for state in states]),
+            ('date', '>=', start.date()), ('date', '<=', end.date())
+        ])
+        stored_df = table.to_pandas().drop(columns=['year', 'month'], errors='ignore')
+        stored_df['date'] = pd.to_datetime(stored_df['date'])
+        stored_df['state'] = stored_df['state'].astype(str)
+        return stored_df
+
+
+class FeatherSink(OutputSink):
+    """One Arrow IPC (Feather v2) file per run."""
+
+    run_files = "weather_data_*.feather"
+
+    def __init__(self, compression='zstd'):
+        if pa is None:
+            raise ImportError("Feather output requires the 'pyarrow' package.")
+        self.compression = compression
+
+    def write(self, weather_df, folder, name):
+        file_path = os.path.join(folder, f"{name}.feather")
+        weather_df.reset_index(drop=True).to_feather(file_path, compression=self.compression)
+        return file_path
+
+    def open_stream(self, folder, name):
+        return _FeatherStream(os.path.join(folder, f"{name}.feather"), self.compression)
+
+
+class SqliteSink(OutputSink):
+    """Upserts rows into a `weather_data` table keyed by (date, state) in a SQLite database."""
+
+    def __init__(self, database_path, table='weather_data'):
+        self.database_path = database_path
+        self.table = table
+
+    def write(self, weather_df, folder, name):
+        measures = [column for column in weather_df.columns if column not in ('date', 'state')]
+        conn = sqlite3.connect(self.database_path)
+        try:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (date TEXT, state TEXT, "
+                + "".join(f"{column} REAL, " for column in measures) + "PRIMARY KEY (date, state))"
+            )
+            rows = zip(weather_df['date'].dt.strftime('%Y-%m-%d'), weather_df['state'].astype(str),
+                       *(weather_df[column].astype(float) for column in measures))
+            placeholders = ", ".join("?" * (len(measures) + 2))
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})", rows)
+        finally:
+            conn.close()
+        return self.database_path
+
+    def read_stored(self, start, end, states):
+        if not os.path.exists(self.database_path):
+            return pd.DataFrame()
+        conn = sqlite3.connect(self.database_path)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)).fetchone():
+                return pd.DataFrame()
+            stored_df = pd.read_sql(
+                f"SELECT * FROM {self.table} WHERE date BETWEEN ? AND ? AND state IN ({', '.join('?' * len(states))})",
+                conn, params=[start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), *map(str, states)]
+            )
+        finally:
+            conn.close()
+        stored_df['date'] = pd.to_datetime(stored_df['date'])
+        return stored_df
+
+
+class DuckDBSink(OutputSink):
+    """Upserts rows into a `weather_data` table keyed by (date, state) in a DuckDB database."""
+
+    def __init__(self, database_path, table='weather_data'):
+        if duckdb is None:
+            raise ImportError("DuckDB output requires the 'duckdb' package.")
+        self.database_path = database_path
+        self.table = table
+
+    def write(self, weather_df, folder, name):
+        measures = [column for column in weather_df.columns if column not in ('date', 'state')]
+        conn = duckdb.connect(self.database_path)
+        try:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (date DATE, state VARCHAR, "
+                + "".join(f"{column} DOUBLE, " for column in measures) + "PRIMARY KEY (date, state))"
+            )
+            conn.register("incoming", weather_df.assign(state=weather_df['state'].astype(str)))
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} SELECT * FROM incoming")
+        finally:
+            conn.close()
+        return self.database_path
+
+    def read_stored(self, start, end, states):
+        if not os.path.exists(self.database_path):
+            return pd.DataFrame()
+        conn = duckdb.connect(self.database_path, read_only=True)
+        try:
+            if not conn.execute("SELECT 1 FROM information_schema.tables WHERE table_name = ?", [self.table]).fetchone():
+                return pd.DataFrame()
+            stored_df = conn.execute(
+                f"SELECT * FROM {self.table} WHERE date BETWEEN ? AND ? AND state IN ({', '.join('?' * len(states))})",
+                [start.date(), end.date(), *map(str, states)]
+            ).df()
+        finally:
+            conn.close()
+        stored_df['date'] = pd.to_datetime(stored_df['date'])
+        return stored_df
+
+
+class BackgroundLogWriter:
+    """Appends JSON log lines from a background thread, so logging never blocks the caller.
+
+    write() only queues the entry. The writer thread serializes entries and appends them
+    per file in batches: once `batch_size` lines are waiting, `flush_interval` seconds after
+    the first one otherwise, and on flush(), close() and interpreter exit. Each batch
+    opens a file once.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size=256, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()  # Unbounded: put() never blocks
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, log_file, log_entry):
+        # The check and the put happen under the lock, so nothing is queued behind close()'s stop marker
+        with self._lock:
+            if not self._closed:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+                self._queue.put((log_file, log_entry))
+                return
+        self._append({log_file: [log_entry]})  # Late messages are written directly
+
+    def _run(self):
+        pending = {}
+        count = 0
+        deadline = None
+        while True:
+            try:
+                item = self._queue.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None  # Interval elapsed
+
+            if isinstance(item, tuple):
+                log_file, log_entry = item
+                pending.setdefault(log_file, []).append(log_entry)
+                count += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if count < self.batch_size:
+                    continue
+
+            self._append(pending)
+            pending = {}
+            count = 0
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()  # A flush() call is waiting
+            elif item is self._STOP:
+                return
+
+    def _append(self, pending):
+        for log_file, log_entries in pending.items():
+            try:
+                with open(log_file, 'a') as f:
+                    f.write("".join(json.dumps(log_entry) + "\n" for log_entry in log_entries))
+            except Exception as e:
+                print(f"Error writing to log file {log_file}: {e}")
+
+    def flush(self, timeout=None):
+        """Blocks until every line queued so far is written."""
+        if self._thread is None or self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Writes the remaining lines and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+            self._queue.put(self._STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+
+_log_writers = {}
+_log_writers_lock = threading.Lock()
+
+
+def get_log_writer(batch_size=256, flush_interval=1.0):
+    """Returns the process-wide BackgroundLogWriter for these settings, so fetchers share one thread."""
+    key = (os.getpid(), batch_size, flush_interval)
+    with _log_writers_lock:
+        writer = _log_writers.get(key)
+        if writer is None:
+            writer = _log_writers[key] = BackgroundLogWriter(batch_size, flush_interval)
+        return writer
+
 
 class WeatherDataFetcher:
-    def __init__(self, locations, start_date, end_date):
+    # POWER parameter -> output column, in output order
+    OUTPUT_COLUMNS = (
+        ('T2M_MAX', 'Temperature_Max'),
+        ('T2M_MIN', 'Temperature_Min'),
+        ('RH2M', 'Humidity'),
+        ('PRECTOTCORR', 'Precipitation'),
+        ('WS2M', 'Wind_Speed')
+    )
+
+    def __init__(self, locations, start_date, end_date, max_workers=1, pool_size=10, geocode_cache=True,
+                 geocoder=None, gazetteer_path=None, response_cache=True, incremental=False,
+                 backfill_chunk=None, chunk_workers=4, chunk_retries=2, retry_policy=None, circuit_breaker=None,
+                 request_timeout=60, rate_limits=None, grid_dedup=True, extraction_mode='point',
+                 compact_dtypes=False, merge_keep='last', output_format='csv', parquet_compression='snappy',
+                 csv_compression=None, streaming=False, stream_window=None, upload_workers=4,
+                 multipart_chunksize=8 * 1024 * 1024, upload_concurrency=10, direct_upload=False,
+                 s3_endpoint_url=None, upload_compression=None, upload_compression_level=None,
+                 upload_compression_threads=-1, log_batch_size=256, log_flush_interval=1.0):
         self.locations = locations  # Now accepting a list of locations
         self.start_date = start_date
         self.end_date = end_date
-        self.geolocator = Nominatim(user_agent="my_geocoder")
+        self.max_workers = max_workers  # Number of locations fetched concurrently (1 = serial)
+        self.incremental = incremental  # Only fetch dates missing from earlier outputs
+        # float32 measures, categorical state and int32 day numbers (days since 1970-01-01) for dates
+        self.compact_dtypes = compact_dtypes
+        self.merge_keep = merge_keep  # Which row wins when a (date, state) pair appears twice: 'first' or 'last'
+        # Write each location as soon as it is ready instead of merging everything in memory
+        self.streaming = streaming
+        self.stream_window = stream_window  # Locations fetched ahead of the writer; None = 2 per worker
+        self.stream_cell_limit = 256  # Finished grid-cell results kept for reuse while streaming
+        self.upload_workers = upload_workers  # Files uploaded to S3 at the same time
+        # Files above one chunk are uploaded in multipart chunks, `upload_concurrency` parts at a time
+        self.multipart_chunksize = multipart_chunksize
+        self.upload_concurrency = upload_concurrency
+        # Serialize the output as gzipped CSV straight into S3 instead of saving and re-reading a local file
+        self.direct_upload = direct_upload
+        self.s3_endpoint_url = s3_endpoint_url  # e.g. a local S3 emulator; defaults to $S3_ENDPOINT_URL
+        # Compress artifacts before upload: None, 'gzip' or 'zstd' (direct uploads default to gzip)
+        self.upload_compression = upload_compression
+        self.upload_compression_level = upload_compression_level  # None = codec default (gzip 6, zstd 3)
+        self.upload_compression_threads = upload_compression_threads  # zstd worker threads, -1 = one per core
+        self._stored_weather = {}
+        self.backfill_chunk = backfill_chunk  # 'year', 'month' or a number of days; None sends one request
+        self.chunk_workers = chunk_workers  # Chunks of one location fetched concurrently
+        self.chunk_retries = chunk_retries  # Extra attempts for a failed chunk when HTTP retries are disabled
+        # POWER meteorology is on the MERRA-2 grid; locations in the same cell share one request
+        self.grid_dedup = grid_dedup
+        self.grid_lat_step = 0.5
+        self.grid_lon_step = 0.625
+        self._cell_requests = OrderedDict()
+        self._cell_lock = threading.Lock()
+        self._grid_cells = set()
+        self.requests_saved = 0
+        self.pool_size = max(pool_size, max_workers)  # Keep-alive connections kept per host
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.request_timeout = request_timeout  # Seconds per API request
+        self.retry_count = 0
+        # Per-host quotas, e.g. {"power.larc.nasa.gov": (5, 10)} as (requests per second, burst)
+        self.rate_limiter = RateLimiter(rate_limits)
+        self.session = self._create_session()
+        # Any object with a geopy-style geocode(query) method can be plugged in
+        self.geolocator = geocoder or self._create_geolocator(gazetteer_path)
         self.base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"  # Updated API endpoint
+        # 'point' sends one request per location, 'regional' one request per bounding box
+        self.extraction_mode = extraction_mode
+        self.regional_url = "https://power.larc.nasa.gov/api/temporal/daily/regional"
+        self.regional_tile_degrees = 10  # POWER accepts regional boxes of 2 to 10 degrees per side
+        self.regional_min_degrees = 2
+        self.regional_params_per_request = 1  # The regional endpoint serves one parameter per request
         self.params = 'TMAX,TMIN,RH2M,PRECTOTCORR,WS2M'
         self.log_directory = r"P:\2025 _Data Engineering Projects\ETL_Projects\Weather_API\Logs"
         self.data_directory = r"P:\2025 _Data Engineering Projects\ETL_Projects\Weather_API\Data"
+        # 'csv', 'parquet', 'feather', 'sqlite', 'duckdb' or an OutputSink instance
+        self.output_format = output_format
+        self.csv_compression = csv_compression  # None, 'gzip', 'bz2', 'xz' or 'zstd'
+        self.parquet_compression = parquet_compression  # Any codec pyarrow supports: snappy, zstd, gzip, ...
         self.info_log_file = None
         self.error_log_file = None
+        # Log lines are batched by a background thread (shared by all fetchers) instead of opening the file per message
+        self._log_writer = get_log_writer(log_batch_size, log_flush_interval)
+        # Coordinates never change, so remember them between runs (moved with data_directory when a run starts)
+        self.geocode_cache = GeocodeCache(os.path.join(self.data_directory, "geocode_cache.sqlite")) if geocode_cache else None
+        # Historical POWER data does not change, so identical requests are served from disk (moved like the geocode cache)
+        self.response_cache = ResponseCache(os.path.join(self.data_directory, "http_cache")) if response_cache else None
+
+        if merge_keep not in ('first', 'last'):
+            raise ValueError(f"merge_keep must be 'first' or 'last', not {merge_keep!r}.")
+        # Incremental runs read earlier outputs back, so the output must be readable locally
+        if incremental and direct_upload:
+            raise ValueError("incremental=True needs a local output to read back; it cannot be combined with direct_upload.")
+        if (incremental and isinstance(output_format, OutputSink) and output_format.run_files is None
+                and type(output_format).read_stored is OutputSink.read_stored):
+            raise ValueError(f"incremental=True needs an output sink that implements read_stored(); "
+                             f"{type(output_format).__name__} does not.")
 
     def _setup_logger(self):
         """Sets up info and error logging with date-specific folders."""
@@ -32,52 +1363,377 @@ class WeatherDataFetcher:
         self.info_log_file = os.path.join(info_log_dir, f"info_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
         self.error_log_file = os.path.join(error_log_dir, f"error_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
 
+    def _create_geolocator(self, gazetteer_path=None):
+        """Creates Nominatim, behind the offline gazetteer when one is configured."""
+        # geopy keeps its own keep-alive session, sized like ours
+        nominatim = Nominatim(
+            user_agent="my_geocoder",
+            adapter_factory=partial(RequestsAdapter, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        )
+        nominatim = RateLimitedGeocoder(nominatim, self.rate_limiter, nominatim.domain)
+        if gazetteer_path:
+            return ChainedGeocoder([GazetteerGeocoder(gazetteer_path), nominatim])
+        return nominatim
+
+    def _create_session(self):
+        """Creates the shared HTTP session used for all API requests."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        self.request_count = 0
+        self.async_connections_opened = 0
+        self._request_count_lock = threading.Lock()
+        return session
+
+    def _count_request(self):
+        with self._request_count_lock:
+            self.request_count += 1
+
+    def _http_get(self, url, **kwargs):
+        """Sends a GET request through the pooled session."""
+        self._count_request()
+        return self.session.get(url, **kwargs)
+
+    async def _on_async_connection_created(self, session, context, params):
+        """Counts connections opened by the aiohttp connector, for connection_stats()."""
+        self.async_connections_opened += 1
+
+    def _record_attempt(self, url, attempt, status, error, latency):
+        """Updates the circuit breaker and logs one request attempt; returns True if it should be retried."""
+        retry = self.retry_policy.should_retry(status)
+        if retry:
+            self.circuit_breaker.record_failure()
+        else:
+            # Client errors such as 422 say nothing about the health of the API
+            self.circuit_breaker.record_success()
+        self._log_info(f"GET {url} -> {status or error} in {latency:.3f}s (attempt {attempt})")
+        return retry
+
+    def _retry_delay(self, url, attempt, status, error, retry_after):
+        """Returns the backoff before the next attempt and logs the retry."""
+        delay = self.retry_policy.delay(attempt, retry_after)
+        with self._request_count_lock:
+            self.retry_count += 1
+        self._log_info(f"Retrying {url} in {delay:.2f}s after {status or error}")
+        return delay
+
+    def _request_with_retry(self, url):
+        """GETs url under the retry policy and circuit breaker and returns the last response."""
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker is open, not requesting {url}")
+
+            self.rate_limiter.acquire(url)
+            response, error, started = None, None, time.perf_counter()
+            try:
+                response = self._http_get(url, timeout=self.request_timeout)
+            except requests.RequestException as e:
+                error = e
+            status = response.status_code if response is not None else None
+
+            retry = self._record_attempt(url, attempt, status, error, time.perf_counter() - started)
+            if not retry or attempt == self.retry_policy.max_attempts:
+                break
+            retry_after = self.retry_policy.parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+            time.sleep(self._retry_delay(url, attempt, status, error, retry_after))
+
+        if response is None:
+            raise error
+        return response
+
+    async def _request_with_retry_async(self, http, url):
+        """Async variant of _request_with_retry; returns (status, body)."""
+        for attempt in range(1, self.retry_policy.max_attempts + 1):
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker is open, not requesting {url}")
+
+            await self.rate_limiter.acquire_async(url)
+            status, content, retry_after, error, started = None, None, None, None, time.perf_counter()
+            self._count_request()
+            try:
+                async with http.get(url) as response:
+                    status = response.status
+                    retry_after = self.retry_policy.parse_retry_after(response.headers.get("Retry-After"))
+                    content = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            retry = self._record_attempt(url, attempt, status, error, time.perf_counter() - started)
+            if not retry or attempt == self.retry_policy.max_attempts:
+                break
+            await asyncio.sleep(self._retry_delay(url, attempt, status, error, retry_after))
+
+        if status is None:
+            raise error
+        return status, content
+
+    def connection_stats(self):
+        """Returns request and connection counters for the pooled session and the asyncio engine."""
+        connections = self.async_connections_opened
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+        return {
+            "requests": self.request_count,
+            "connections_opened": connections,
+            "connections_reused": max(self.request_count - connections, 0),
+            "retries": self.retry_count,
+            "circuit_breaker": self.circuit_breaker.state
+        }
+
     def get_coordinates(self, location):
         """Fetch coordinates of the location."""
+        if self.geocode_cache:
+            try:
+                cached, coordinates = self.geocode_cache.get(location)
+                if cached:
+                    if coordinates is None:
+                        self._log_error(f"Location '{location}' not found (cached).")
+                        return None, None
+                    return coordinates
+            except Exception as e:
+                self._log_error(f"Error reading geocode cache for {location}: {e}")
+
         try:
             location_data = self.geolocator.geocode(location)
             if not location_data:
                 self._log_error(f"Location '{location}' not found.")
-            return location_data.longitude, location_data.latitude
+                self._cache_coordinates(location, None)
+                return None, None
+            coordinates = (location_data.longitude, location_data.latitude)
+            self._cache_coordinates(location, coordinates)
+            return coordinates
         except Exception as e:
             self._log_error(f"Error fetching coordinates for {location}: {e}")
             return None, None
         
-    def fetch_weather_data(self, longitude, latitude):
+    def _cache_coordinates(self, location, coordinates):
+        """Stores a geocoding result in the cache, if enabled."""
+        if self.geocode_cache:
+            try:
+                self.geocode_cache.put(location, coordinates)
+            except Exception as e:
+                self._log_error(f"Error writing geocode cache for {location}: {e}")
+
+    def _build_weather_url(self, longitude, latitude, start_date=None, end_date=None):
+        """Builds the POWER daily point request URL for the coordinates and date range."""
+        start_date = start_date or self.start_date
+        end_date = end_date or self.end_date
+        return f"{self.base_url}?parameters={self.params}&community=RE&longitude={longitude}&latitude={latitude}&start={start_date}&end={end_date}&format=JSON"
+
+    def _get_cached_response(self, url):
+        """Returns a cached response body for url, if the response cache has one."""
+        if self.response_cache:
+            try:
+                return self.response_cache.get(url)
+            except Exception as e:
+                self._log_error(f"Error reading response cache: {e}")
+        return None
+
+    def _cache_response(self, url, end_date, content, fill_values=False):
+        """Stores a successful response body in the response cache."""
+        if self.response_cache:
+            try:
+                self.response_cache.put(url, end_date or self.end_date, content, fill_values)
+            except Exception as e:
+                self._log_error(f"Error writing response cache: {e}")
+
+    def fetch_weather_data(self, longitude, latitude, start_date=None, end_date=None):
         """Fetch weather data from the API, and return None if response is invalid."""
         try:
-            url = f"{self.base_url}?parameters={self.params}&community=RE&longitude={longitude}&latitude={latitude}&start={self.start_date}&end={self.end_date}&format=JSON"
-            response = requests.get(url)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                self._log_error(f"API request failed with status code {response.status_code} for coordinates: ({longitude}, {latitude})")
-                return None
+            return self._fetch_weather_series(longitude, latitude, start_date, end_date)
+        except PowerRequestError as e:
+            self._log_error(str(e))
+            return None
         except Exception as e:
             self._log_error(f"Error fetching weather data for coordinates ({longitude}, {latitude}): {e}")
             return None
+
+    def _fetch_weather_series(self, longitude, latitude, start_date=None, end_date=None):
+        """fetch_weather_data without the error handling: failures raise."""
+        url = self._build_weather_url(longitude, latitude, start_date, end_date)
+        content = self._get_cached_response(url)
+        if content is not None:
+            return decode_weather_payload(content)
+
+        response = self._request_with_retry(url)
+        if response.status_code != 200:
+            raise PowerRequestError(response.status_code, f"API request failed with status code {response.status_code} "
+                                                          f"for coordinates: ({longitude}, {latitude})")
+        weather_json = decode_weather_payload(response.content)
+        self._cache_response(url, end_date, response.content, has_fill_values(weather_json))
+        return weather_json
         
-    def process_weather_data(self, weather_json, location):
-        """Process raw weather data into a structured DataFrame."""
+    async def fetch_weather_data_async(self, http, longitude, latitude, start_date=None, end_date=None):
+        """Async variant of fetch_weather_data using an aiohttp session."""
         try:
-            records = weather_json.get('properties', {}).get('parameter', {})
-            if not records:
-                self._log_error(f"No weather data available for {location}.")
+            url = self._build_weather_url(longitude, latitude, start_date, end_date)
+            content = await asyncio.to_thread(self._get_cached_response, url)
+            if content is not None:
+                return decode_weather_payload(content)
+
+            status, content = await self._request_with_retry_async(http, url)
+            if status == 200:
+                weather_json = decode_weather_payload(content)
+                await asyncio.to_thread(self._cache_response, url, end_date, content, has_fill_values(weather_json))
+                return weather_json
+            else:
+                self._log_error(f"API request failed with status code {status} for coordinates: ({longitude}, {latitude})")
+                return None
+        except Exception as e:
+            self._log_error(f"Error fetching weather data for coordinates ({longitude}, {latitude}): {e}")
+            return None
+
+    def plan_date_chunks(self, start_date=None, end_date=None):
+        """Splits a date range into (start, end) chunks following `backfill_chunk`."""
+        start_date = start_date or self.start_date
+        end_date = end_date or self.end_date
+        if not self.backfill_chunk:
+            return [(start_date, end_date)]
+
+        start = pd.to_datetime(start_date, format='%Y%m%d')
+        end = pd.to_datetime(end_date, format='%Y%m%d')
+        if self.backfill_chunk == 'year':
+            edges = pd.date_range(start, end, freq='YS')
+        elif self.backfill_chunk == 'month':
+            edges = pd.date_range(start, end, freq='MS')
+        else:
+            edges = pd.date_range(start, end, freq=f"{int(self.backfill_chunk)}D")
+
+        edges = [start] + [edge for edge in edges if edge > start]
+        chunk_ends = [edge - pd.Timedelta(days=1) for edge in edges[1:]] + [end]
+        return [(chunk_start.strftime('%Y%m%d'), chunk_end.strftime('%Y%m%d'))
+                for chunk_start, chunk_end in zip(edges, chunk_ends)]
+
+    def _fetch_chunk(self, longitude, latitude, location, start_date, end_date):
+        """Fetches and processes one chunk.
+
+        Transient HTTP failures are already retried by _request_with_retry, so the chunk
+        itself is only retried (`chunk_retries` times) when the retry policy allows a
+        single attempt, and only for transient failures: 422s, an open circuit or
+        undecodable payloads would fail the same way again.
+        """
+        chunk_retries = self.chunk_retries if self.retry_policy.max_attempts <= 1 else 0
+        for attempt in range(1, chunk_retries + 2):
+            try:
+                weather_json = self._fetch_weather_series(longitude, latitude, start_date, end_date)
+            except Exception as e:
+                transient = isinstance(e, requests.RequestException) or (
+                    isinstance(e, PowerRequestError) and self.retry_policy.should_retry(e.status_code))
+                if transient and attempt <= chunk_retries:
+                    delay = self.retry_policy.delay(attempt)
+                    self._log_info(f"Retrying {location} {start_date}-{end_date} in {delay:.2f}s after: {e}")
+                    time.sleep(delay)
+                    continue
+                self._log_error(f"Giving up on {location} {start_date}-{end_date} after {attempt} attempts: {e}")
                 return pd.DataFrame()
+            return self.process_weather_data(weather_json, location)
+
+    def fetch_backfill(self, longitude, latitude, location, start_date=None, end_date=None):
+        """Fetches a long date range chunk by chunk and stitches the chunks into one ordered DataFrame."""
+        chunks = self.plan_date_chunks(start_date, end_date)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.chunk_workers, len(chunks)))) as executor:
+            # map() keeps the chunks in date order
+            chunk_frames = list(executor.map(
+                lambda chunk: self._fetch_chunk(longitude, latitude, location, *chunk), chunks
+            ))
 
-            weather_df = pd.DataFrame.from_dict(records)
+        chunk_frames = [frame for frame in chunk_frames if not frame.empty]
+        if not chunk_frames:
+            return pd.DataFrame()
+        return pd.concat(chunk_frames, ignore_index=True)
 
-            # Extract year, month, and day from the index
-            weather_df = weather_df[['RH2M', 'WS2M', 'PRECTOTCORR', 'T2M_MAX', 'T2M_MIN']]
-            weather_df.columns = ['Humidity','Wind_Speed','Precipitation','Temperature_Max', 'Temperature_Min']
-            weather_df = weather_df.reset_index().rename(columns={'index': 'date'})
-            weather_df['date'] = pd.to_datetime(weather_df['date'], format='%Y%m%d')
+    def _fetch_date_range(self, longitude, latitude, location, start_date, end_date):
+        """Fetches and processes one date range, in chunks when it is longer than `backfill_chunk`."""
+        if len(self.plan_date_chunks(start_date, end_date)) > 1:
+            return self.fetch_backfill(longitude, latitude, location, start_date, end_date)
+        weather_json = self.fetch_weather_data(longitude, latitude, start_date, end_date)
+        return self.process_weather_data(weather_json, location)
 
-            # Add location name to the DataFrame
-            weather_df['state'] = location
-            weather_df = weather_df[['date', 'state', 'Temperature_Max', 'Temperature_Min', 'Humidity', 'Precipitation', 'Wind_Speed']]
+    def snap_to_grid(self, longitude, latitude):
+        """Returns the centre of the POWER grid cell containing the coordinates."""
+        if longitude is None or latitude is None:
+            return longitude, latitude
+        return (round(round(longitude / self.grid_lon_step) * self.grid_lon_step, 4),
+                round(round(latitude / self.grid_lat_step) * self.grid_lat_step, 4))
 
+    def _claim_cell_request(self, key, create, requests=1):
+        """Returns (owner, pending) for a grid cell request, registering `create()` if it is the first."""
+        with self._cell_lock:
+            self._grid_cells.add(key[:2])
+            pending = self._cell_requests.get(key)
+            if pending is not None:
+                self.requests_saved += requests
+                return False, pending
+            pending = self._cell_requests[key] = create()
+            if self.streaming:
+                # Bound memory: forget the oldest finished cells (the response cache still has them)
+                while len(self._cell_requests) > self.stream_cell_limit:
+                    oldest = next(iter(self._cell_requests.values()))
+                    if not oldest.done():
+                        break
+                    self._cell_requests.popitem(last=False)
+            return True, pending
+
+    def _fetch_cell_range(self, longitude, latitude, location, start_date, end_date):
+        """Fetches a date range for a grid cell once per run and hands a copy to every location in it."""
+        owner, future = self._claim_cell_request((longitude, latitude, start_date, end_date), Future,
+                                                 requests=len(self.plan_date_chunks(start_date, end_date)))
+        if owner:
+            try:
+                future.set_result(self._fetch_date_range(longitude, latitude, location, start_date, end_date))
+            except Exception as e:
+                future.set_exception(e)
+
+        weather_df = future.result()
+        if owner or weather_df.empty:
             return weather_df
+        return weather_df.assign(state=self._state_column(location, len(weather_df)))
+
+    async def _fetch_cell_json_async(self, http, semaphore, longitude, latitude, start_date, end_date):
+        """Async counterpart of _fetch_cell_range, sharing the raw JSON between locations of a cell."""
+        async def fetch():
+            async with semaphore:
+                return await self.fetch_weather_data_async(http, longitude, latitude, start_date, end_date)
+
+        _, task = self._claim_cell_request((longitude, latitude, start_date, end_date),
+                                           lambda: asyncio.ensure_future(fetch()))
+        return await task
+
+    def _grid_dedup_report(self):
+        """Logs how many API requests grid-cell deduplication saved in this run."""
+        if self.grid_dedup:
+            self._log_info(f"Grid deduplication: {len(self.locations)} locations in {len(self._grid_cells)} cells, "
+                           f"{self.requests_saved} requests saved")
+
+    def process_weather_data(self, weather_json, location):
+        """Process raw weather data (JSON dict or WeatherSeries) into a structured DataFrame."""
+        try:
+            if isinstance(weather_json, WeatherSeries):
+                series = weather_json
+            else:
+                records = weather_json.get('properties', {}).get('parameter', {})
+                if not records:
+                    self._log_error(f"No weather data available for {location}.")
+                    return pd.DataFrame()
+                series = records_to_series(records)
+
+            # Build the output columns once, in their final order, from the aligned arrays
+            if self.compact_dtypes:
+                columns = {'date': series.dates.view(np.int64).astype(np.int32),
+                           'state': self._state_column(location, len(series.dates))}
+                for parameter, column in self.OUTPUT_COLUMNS:
+                    columns[column] = series.values[parameter].astype(np.float32)
+            else:
+                columns = {'date': series.dates.astype('datetime64[ns]'), 'state': location}
+                for parameter, column in self.OUTPUT_COLUMNS:
+                    columns[column] = series.values[parameter]
+            return pd.DataFrame(columns, copy=False)
         except KeyError as e:
             self._log_error(f"Missing expected data field for {location}: {e}")
             return pd.DataFrame()
@@ -85,10 +1741,114 @@ class WeatherDataFetcher:
             self._log_error(f"Error processing weather data for {location}: {e}")
             return pd.DataFrame()
 
+    def _state_column(self, location, length):
+        """Returns the state column for a location in the configured dtype."""
+        if self.compact_dtypes:
+            return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[location])
+        return location
+
+    def _compact_frame(self, weather_df):
+        """Converts a frame with datetime dates to the compact schema."""
+        if weather_df.empty:
+            return weather_df
+        measures = [column for _, column in self.OUTPUT_COLUMNS]
+        return weather_df.assign(
+            date=self._date_values(weather_df).view(np.int64).astype(np.int32),
+            state=weather_df['state'].astype('category'),
+            **{column: weather_df[column].astype(np.float32) for column in measures}
+        )
+
+    def _date_values(self, weather_df):
+        """Returns the date column as datetime64[D], whichever schema the frame uses."""
+        dates = weather_df['date'].to_numpy()
+        if np.issubdtype(dates.dtype, np.integer):
+            return dates.astype(np.int64).astype('datetime64[D]')
+        return dates.astype('datetime64[D]')
+
+    def _output_frame(self, weather_df):
+        """Returns the frame as written to disk: compact day numbers become dates again."""
+        if not weather_df.empty and np.issubdtype(weather_df['date'].dtype, np.integer):
+            return weather_df.assign(date=self._date_values(weather_df).astype('datetime64[ns]'))
+        return weather_df
+
+    def _concat_frames(self, frames):
+        """Concatenates frames, keeping the categorical state column categorical."""
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        if self.compact_dtypes:
+            # pandas falls back to object when categories differ, so align them first
+            categories = pd.api.types.union_categoricals([frame['state'] for frame in frames]).categories
+            frames = [frame.assign(state=frame['state'].cat.set_categories(categories)) for frame in frames]
+        return pd.concat(frames, ignore_index=True)
+
+    def merge_weather_frames(self, weather_df_list):
+        """Merges per-location frames into one, deduplicated on (date, state).
+
+        Output columns are allocated once and filled frame by frame. Duplicates are
+        found by hashing one int64 key per row (day number and state code), so the
+        float columns are never hashed; `merge_keep` decides which row survives.
+        """
+        frames = [frame for frame in weather_df_list if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        columns = list(frames[0].columns)
+        total = sum(len(frame) for frame in frames)
+
+        merged = {column: np.empty(total, dtype=frames[0][column].to_numpy().dtype)
+                  for column in columns if column != 'state'}
+        state_codes = np.empty(total, dtype=np.int32)
+        categories = {}
+        offset = 0
+        for frame in frames:
+            end = offset + len(frame)
+            for column, values in merged.items():
+                values[offset:end] = frame[column].to_numpy()
+            codes, uniques = pd.factorize(frame['state'])
+            mapping = np.array([categories.setdefault(state, len(categories)) for state in uniques], dtype=np.int32)
+            state_codes[offset:end] = mapping[codes]
+            offset = end
+
+        days = self._date_values(pd.DataFrame({'date': merged['date']}, copy=False)).view(np.int64)
+        keys = days * max(len(categories), 1) + state_codes
+        duplicated = pd.Index(keys).duplicated(keep=self.merge_keep)
+        if duplicated.any():
+            keep = ~duplicated
+            merged = {column: values[keep] for column, values in merged.items()}
+            state_codes = state_codes[keep]
+
+        state_names = np.array(list(categories), dtype=object)
+        if self.compact_dtypes:
+            merged['state'] = pd.Categorical.from_codes(state_codes, categories=state_names)
+        else:
+            merged['state'] = state_names[state_codes]
+        return pd.DataFrame({column: merged[column] for column in columns}, copy=False)
+
+    def create_sink(self, output_format=None):
+        """Returns the output sink for `output_format` (defaults to the configured one)."""
+        output_format = output_format or self.output_format
+        if isinstance(output_format, OutputSink):
+            return output_format
+        if output_format == 'csv':
+            return CsvSink(self.csv_compression)
+        if output_format == 'parquet':
+            return ParquetSink(os.path.join(self.data_directory, "weather_parquet"), self.parquet_compression)
+        if output_format == 'feather':
+            return FeatherSink()
+        if output_format == 'sqlite':
+            return SqliteSink(os.path.join(self.data_directory, "weather_data.sqlite"))
+        if output_format == 'duckdb':
+            return DuckDBSink(os.path.join(self.data_directory, "weather_data.duckdb"))
+        raise ValueError(f"Unknown output format: {output_format}")
+
     def save_merged_weather_data(self, weather_df_list):
-        """Merge all weather DataFrames and save them to a CSV file."""
+        """Merge all weather DataFrames and save them through the configured output sink."""
         try:
-            merged_weather_df = pd.concat(weather_df_list, ignore_index=True)
+            # A single frame has already been merged by fetch_and_process_weather
+            if len(weather_df_list) == 1:
+                merged_weather_df = weather_df_list[0]
+            else:
+                merged_weather_df = self.merge_weather_frames(weather_df_list)
 
             # Create today's date folder if it doesn't exist
             today_date = datetime.now().strftime('%Y-%m-%d')
@@ -96,20 +1856,89 @@ class WeatherDataFetcher:
             if not os.path.exists(today_folder):
                 os.makedirs(today_folder)
 
-            file_name = f"weather_data_{self.start_date}_{self.end_date}.csv"
-            file_path = os.path.join(today_folder, file_name)
-
-            merged_weather_df.to_csv(file_path, index=False)
-            return file_path
+            file_name = f"weather_data_{self.start_date}_{self.end_date}"
+            return self.create_sink().write(self._output_frame(merged_weather_df), today_folder, file_name)
         except Exception as e:
             self._log_error(f"Error saving merged weather data: {e}")
             return None
 
-    def upload_csv_to_s3(self):
-        """
-        Uploads all CSV files from the current day's data folder to the S3 bucket.
-        """
-        load_dotenv()
+    def _upload_files(self, paths):
+        """Expands the artifacts of a run (files or dataset directories) into (local path, S3 key) pairs."""
+        uploads = []
+        for path in paths:
+            if os.path.isdir(path):
+                files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+            else:
+                files = [path]
+            for local_file_path in files:
+                # Keys mirror the layout under the data directory, e.g. 2024-10-01/weather_data_....csv
+                relative_path = os.path.relpath(local_file_path, self.data_directory)
+                if relative_path.startswith(os.pardir):
+                    relative_path = os.path.basename(local_file_path)
+                s3_object_key = relative_path.replace(os.sep, '/')
+                codec = self._upload_codec(local_file_path)
+                if codec:
+                    s3_object_key += UPLOAD_CODECS[codec]
+                uploads.append((local_file_path, s3_object_key))
+        return uploads
+
+    def _upload_codec(self, path):
+        """Returns the codec a file is compressed with before upload, or None to upload it as is."""
+        if self.upload_compression and not path.endswith(COMPRESSED_SUFFIXES):
+            return self.upload_compression
+        return None
+
+    def _compress_for_upload(self, local_file_path, codec):
+        """Compresses a file into a temporary file, logs ratio and time, and returns the temporary path."""
+        started = time.perf_counter()
+        with open(local_file_path, 'rb') as source, \
+                tempfile.NamedTemporaryFile(suffix=UPLOAD_CODECS[codec], delete=False) as target:
+            try:
+                with open_compressor(target, codec, self.upload_compression_level,
+                                     self.upload_compression_threads) as compressor:
+                    shutil.copyfileobj(source, compressor, 1 << 20)
+            except BaseException:
+                target.close()
+                os.remove(target.name)
+                raise
+        elapsed = time.perf_counter() - started
+        size, compressed_size = os.path.getsize(local_file_path), os.path.getsize(target.name)
+        self._log_info(f"Compressed {os.path.basename(local_file_path)} with {codec}: {size} -> {compressed_size} bytes "
+                       f"({size / max(compressed_size, 1):.1f}x) in {elapsed:.2f}s")
+        return target.name
+
+    def _file_md5(self, path):
+        """Returns the hex MD5 of a file, read in 1 MB blocks."""
+        digest = hashlib.md5()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load_upload_manifest(self):
+        """Returns {S3 key: {"size", "md5", "uploaded"}} for everything uploaded so far."""
+        manifest_path = os.path.join(self.data_directory, "upload_manifest.json")
+        try:
+            with open(manifest_path, 'r') as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self._log_error(f"Ignoring unreadable upload manifest {manifest_path}: {e}")
+            return {}
+
+    def _save_upload_manifest(self, manifest):
+        """Writes the upload manifest atomically."""
+        os.makedirs(self.data_directory, exist_ok=True)  # Direct uploads may not have created it
+        manifest_path = os.path.join(self.data_directory, "upload_manifest.json")
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w') as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+        os.replace(temp_path, manifest_path)
+
+    def _create_s3_client(self):
+        """Returns the shared (S3 client, bucket name) for the environment, or (None, None) if settings are missing."""
+        load_environment()
 
         # Get AWS credentials and S3 configuration from environment variables
         aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
@@ -119,42 +1948,148 @@ class WeatherDataFetcher:
 
         # Ensure all required variables are set
         if not aws_access_key_id or not aws_secret_access_key or not bucket_name:
-            self._log_error("Error: AWS credentials or bucket name are missing in the environment variables.")
-            return
+            return None, None
 
-        # Initialize S3 client with the loaded credentials
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=region_name
-        )
+        endpoint_url = self.s3_endpoint_url or os.getenv('S3_ENDPOINT_URL') or None
+        return get_s3_client(aws_access_key_id, aws_secret_access_key, region_name, endpoint_url), bucket_name
 
-        # Get today's date
-        today_date = datetime.now().strftime('%Y-%m-%d')
+    def open_s3_stream(self):
+        """Opens a compressed CSV stream straight into s3://<bucket>/<today>/weather_data_<start>_<end>.csv.gz (or .zst)."""
+        s3, bucket_name = self._create_s3_client()
+        if s3 is None:
+            raise ValueError("AWS credentials or bucket name are missing in the environment variables.")
+        codec = self.upload_compression or 'gzip'
+        s3_object_key = (f"{datetime.now().strftime('%Y-%m-%d')}/weather_data_{self.start_date}_{self.end_date}"
+                         f".csv{UPLOAD_CODECS[codec]}")
+        writer = S3MultipartWriter(s3, bucket_name, s3_object_key, self.multipart_chunksize, self.upload_concurrency,
+                                   extra_args=s3_content_metadata(s3_object_key))
+        try:
+            compressor = open_compressor(writer, codec, self.upload_compression_level, self.upload_compression_threads)
+        except Exception:
+            writer.abort()
+            raise
+        return _S3CsvStream(writer, compressor)
+
+    def upload_frame_to_s3(self, weather_df):
+        """Serializes a merged frame as gzipped CSV directly into S3 and returns its s3:// URL."""
+        stream = self.open_s3_stream()
+        try:
+            stream.write(self._output_frame(weather_df))
+        except BaseException:
+            stream.abort()
+            raise
+        s3_url = stream.close()
+        if s3_url:
+            self._record_direct_upload(stream.writer)
+        return s3_url
 
-        # Define today's folder path
-        today_folder = os.path.join(self.data_directory, today_date)
+    def _record_direct_upload(self, writer):
+        """Logs a finished direct upload and adds it to the upload manifest."""
+        self._log_info(f"Successfully streamed {writer.size} bytes to s3://{writer.bucket_name}/{writer.key} "
+                       f"in {writer.elapsed:.2f}s ({writer.size / max(writer.elapsed, 1e-9) / 1e6:.2f} MB/s)")
+        try:
+            manifest = self._load_upload_manifest()
+            manifest[f"{writer.bucket_name}/{writer.key}"] = {
+                "size": writer.size, "md5": writer.md5.hexdigest(),
+                "uploaded": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            self._save_upload_manifest(manifest)
+        except OSError as e:
+            self._log_error(f"Failed to write upload manifest: {e}")
 
-        # Check if today's folder exists
-        if not os.path.exists(today_folder):
-            self._log_error(f"Error: Today's folder {today_folder} does not exist.")
+    def upload_csv_to_s3(self, file_paths=None):
+        """
+        Uploads the given artifacts to the S3 bucket (by default the CSV and Feather outputs in the current day's data folder).
+
+        Uploaded keys are recorded with their size and MD5 in upload_manifest.json, and files
+        whose content is already in the bucket under the same key are skipped.
+        """
+        s3, bucket_name = self._create_s3_client()
+        if s3 is None:
+            self._log_error("Error: AWS credentials or bucket name are missing in the environment variables.")
             return
 
-        # Loop through all files in the local folder (current day's folder)
-        for file_name in os.listdir(today_folder):
-            if file_name.endswith('.csv'):  # Process only CSV files
-                local_file_path = os.path.join(today_folder, file_name) 
+        if file_paths is None:
+            # Define today's folder path
+            today_folder = os.path.join(self.data_directory, datetime.now().strftime('%Y-%m-%d'))
 
-                # Define the S3 object key (path inside the bucket)
-                s3_object_key = f"{today_date}/{file_name}"  # Upload to a folder named by today's date
+            # Check if today's folder exists
+            if not os.path.exists(today_folder):
+                self._log_error(f"Error: Today's folder {today_folder} does not exist.")
+                return
+            # Only finished run outputs: not other files, nor the .tmp file of a streaming run in progress
+            patterns = (CsvSink.run_files, FeatherSink.run_files)
+            file_paths = [os.path.join(today_folder, file_name) for file_name in sorted(os.listdir(today_folder))
+                          if any(fnmatch.fnmatch(file_name, pattern) for pattern in patterns)
+                          and not file_name.endswith(".tmp") and os.path.isfile(os.path.join(today_folder, file_name))]
 
+        manifest = self._load_upload_manifest()
+        transfer_config = self.create_transfer_config()
+        uploads = self._upload_files(file_paths)
+        uploaded = skipped = 0
+        total_bytes = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(self.upload_workers or 1, 1)) as executor:
+            futures = [
+                (local_file_path, executor.submit(self._upload_file, s3, bucket_name, local_file_path, s3_object_key,
+                                                  manifest.get(f"{bucket_name}/{s3_object_key}"), transfer_config))
+                for local_file_path, s3_object_key in uploads
+            ]
+            for local_file_path, future in futures:
                 try:
-                    # Upload the file to S3
-                    s3.upload_file(local_file_path, bucket_name, s3_object_key)
-                    self._log_info(f"Successfully uploaded {file_name} to {s3_object_key}")
+                    s3_object_key, entry = future.result()
                 except Exception as e:
-                    self._log_error(f"Failed to upload {file_name}: {e}")
+                    self._log_error(f"Failed to upload {os.path.basename(local_file_path)}: {e}")
+                    continue
+                if entry is None:
+                    skipped += 1
+                else:
+                    manifest[f"{bucket_name}/{s3_object_key}"] = entry
+                    uploaded += 1
+                    total_bytes += entry["uploaded_size"]
+        elapsed = time.perf_counter() - started
+
+        if uploaded:
+            try:
+                self._save_upload_manifest(manifest)
+            except OSError as e:
+                self._log_error(f"Failed to write upload manifest: {e}")
+        self._log_info(f"S3 upload: {uploaded} files uploaded, {skipped} unchanged files skipped, "
+                       f"{total_bytes} bytes in {elapsed:.2f}s ({total_bytes / max(elapsed, 1e-9) / 1e6:.2f} MB/s)")
+
+    def create_transfer_config(self):
+        """Returns the boto3 TransferConfig for S3 uploads: multipart above one chunk, parts sent concurrently."""
+        return TransferConfig(
+            multipart_threshold=self.multipart_chunksize,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.upload_concurrency,
+            use_threads=self.upload_concurrency > 1
+        )
+
+    def _upload_file(self, s3, bucket_name, local_file_path, s3_object_key, manifest_entry, transfer_config):
+        """Uploads one file unless the manifest shows the same content; returns (key, new manifest entry or None)."""
+        size = os.path.getsize(local_file_path)
+        md5 = self._file_md5(local_file_path)
+        if manifest_entry and manifest_entry.get("size") == size and manifest_entry.get("md5") == md5:
+            return s3_object_key, None
+
+        codec = self._upload_codec(local_file_path)
+        upload_path = self._compress_for_upload(local_file_path, codec) if codec else local_file_path
+        try:
+            # Upload the file to S3
+            started = time.perf_counter()
+            s3.upload_file(upload_path, bucket_name, s3_object_key, ExtraArgs=s3_content_metadata(s3_object_key),
+                           Config=transfer_config)
+            elapsed = time.perf_counter() - started
+            uploaded_size = os.path.getsize(upload_path)
+        finally:
+            if upload_path != local_file_path:
+                os.remove(upload_path)
+        self._log_info(f"Successfully uploaded {os.path.basename(local_file_path)} to {s3_object_key} "
+                       f"({uploaded_size} bytes in {elapsed:.2f}s, {uploaded_size / max(elapsed, 1e-9) / 1e6:.2f} MB/s)")
+        # size/md5 describe the local file, so unchanged files are skipped before any compression work
+        return s3_object_key, {"size": size, "md5": md5, "uploaded_size": uploaded_size,
+                               "uploaded": datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
     def _log_info(self, message):
         """Logs an info message if the info log file is set."""
@@ -177,54 +2112,534 @@ class WeatherDataFetcher:
             self._write_log(self.error_log_file, log_entry)
 
     def _write_log(self, log_file, log_entry):
-        """Writes the log entry as a JSON object to the file."""
+        """Queues the log entry to be appended as a JSON object to the file."""
+        self._log_writer.write(log_file, log_entry)
+
+    def flush_logs(self):
+        """Blocks until every queued log line is on disk."""
+        self._log_writer.flush()
+
+    def close(self):
+        """Flushes the logs; the shared log writer keeps running for other fetchers and stops at exit."""
+        self._log_writer.flush()
+
+    def _stored_output_files(self, pattern):
+        """Returns earlier per-run outputs whose date range overlaps the window, newest first."""
+        paths = []
+        for path in glob.glob(os.path.join(self.data_directory, "*", pattern)):
+            if path.endswith(".tmp"):
+                continue
+            # weather_data_<start>_<end>.csv: skip files that cannot hold any day of the window
+            parts = os.path.basename(path).split(".")[0].split("_")
+            if len(parts) == 4 and parts[2].isdigit() and parts[3].isdigit():
+                if parts[3] < str(self.start_date) or parts[2] > str(self.end_date):
+                    continue
+            paths.append(path)
+        # Date folders sort chronologically; within a folder the latest write wins
+        return sorted(paths, key=lambda path: (os.path.basename(os.path.dirname(path)), os.path.getmtime(path)),
+                      reverse=True)
+
+    def _load_stored_weather_data(self):
+        """Loads rows saved by earlier runs for the current locations and date window, by location.
+
+        Files are read newest first and reading stops once every location has a row for
+        every day of the window, so the cost does not grow with the history kept on disk.
+        """
+        start = pd.to_datetime(self.start_date, format='%Y%m%d')
+        end = pd.to_datetime(self.end_date, format='%Y%m%d')
+        sink = self.create_sink()
+        if sink.run_files is None:
+            # Table and dataset sinks are keyed by (date, state) and filter on read
+            stored_df = sink.read_stored(start, end, self.locations)
+            return self._group_stored_rows(stored_df) if not stored_df.empty else {}
+
+        window_days = (end - start).days + 1
+        covered = {location: set() for location in self.locations}
+        frames = []
+
+        for path in self._stored_output_files(sink.run_files):
+            try:
+                if path.endswith(".feather"):
+                    stored_df = pd.read_feather(path)
+                    stored_df['date'] = pd.to_datetime(stored_df['date'])
+                else:
+                    stored_df = pd.read_csv(path, parse_dates=['date'])
+            except Exception as e:
+                self._log_error(f"Error reading stored weather data {path}: {e}")
+                continue
+            stored_df = stored_df[
+                (stored_df['date'] >= start) & (stored_df['date'] <= end) & stored_df['state'].isin(self.locations)
+            ]
+            frames.append(stored_df)
+
+            days = stored_df['date'].to_numpy().astype('datetime64[D]').view(np.int64)
+            for state, state_days in pd.Series(days).groupby(stored_df['state'].to_numpy()):
+                covered[state].update(state_days.tolist())
+            if all(len(days) >= window_days for days in covered.values()):
+                break
+
+        if not frames:
+            return {}
+        stored_df = pd.concat(frames, ignore_index=True)
+        stored_df = stored_df.drop_duplicates(subset=['date', 'state'], keep='first')  # Newest file first
+        return self._group_stored_rows(stored_df)
+
+    def _group_stored_rows(self, stored_df):
+        """Splits stored rows by location, dropping days POWER had not filled in yet."""
+        stored_df = stored_df[['date', 'state'] + [column for _, column in self.OUTPUT_COLUMNS]]
+
+        # POWER fills days it has no data for yet with -999; fetch those again
+        measures = stored_df.columns.difference(['date', 'state'])
+        stored_df = stored_df[~(stored_df[measures] == -999).any(axis=1)]
+        if self.compact_dtypes:
+            stored_df = self._compact_frame(stored_df)
+        return {state: group.sort_values('date') for state, group in stored_df.groupby('state', sort=False)}
+
+    def _missing_date_ranges(self, location):
+        """Returns the (start, end) date ranges still to fetch for a location."""
+        stored_df = self._stored_weather.get(location)
+        if stored_df is None or stored_df.empty:
+            return [(self.start_date, self.end_date)]
+
+        window = pd.date_range(pd.to_datetime(self.start_date, format='%Y%m%d'),
+                               pd.to_datetime(self.end_date, format='%Y%m%d'), freq='D')
+        missing = window.difference(pd.DatetimeIndex(self._date_values(stored_df)))
+        if missing.empty:
+            return []
+
+        # Split the missing days wherever they stop being consecutive
+        breaks = np.flatnonzero(np.diff(missing.values).astype('timedelta64[D]').astype(int) != 1)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(missing) - 1]))
+        return [(missing[s].strftime('%Y%m%d'), missing[e].strftime('%Y%m%d')) for s, e in zip(starts, ends)]
+
+    def _combine_location_data(self, location, fetched_frames):
+        """Merges newly fetched rows with the rows already stored for a location."""
+        stored_df = self._stored_weather.get(location)
+        frames = [frame for frame in fetched_frames if not frame.empty]
+        if stored_df is not None and not stored_df.empty:
+            frames.insert(0, stored_df)
+        if not frames:
+            return pd.DataFrame()
+        if len(frames) == 1:
+            return frames[0]
+        combined_df = self._concat_frames(frames)
+        # Freshly fetched rows come last and replace stored ones for the same day
+        combined_df = combined_df.drop_duplicates(subset=['date'], keep='last')
+        return combined_df.sort_values('date', ignore_index=True)
+
+    def _fetch_location(self, location):
+        """Fetch coordinates and weather data for one location and return its DataFrame."""
         try:
-            with open(log_file, 'a') as f:
-                json.dump(log_entry, f)
-                f.write("\n")
+            date_ranges = self._missing_date_ranges(location)
+            if not date_ranges:
+                self._log_info(f"Stored weather data for {location} is up to date.")
+                return self._combine_location_data(location, [])
+
+            # Fetch coordinates
+            longitude, latitude = self.get_coordinates(location)
+
+            # Fetch and process the weather data for each missing range
+            if self.grid_dedup:
+                longitude, latitude = self.snap_to_grid(longitude, latitude)
+                fetch_range = self._fetch_cell_range
+            else:
+                fetch_range = self._fetch_date_range
+            weather_frames = [
+                fetch_range(longitude, latitude, location, start_date, end_date)
+                for start_date, end_date in date_ranges
+            ]
+
+            return self._combine_location_data(location, weather_frames)
         except Exception as e:
-            print(f"Error writing to log file {log_file}: {e}")
+            # A failing location must not take down the others
+            self._log_error(f"Error fetching weather data for {location}: {e}")
+            return pd.DataFrame()
 
-    def fetch_and_process_weather(self):
-        """Main method to fetch, process, and save weather data."""
+    async def _fetch_location_async(self, http, semaphore, location):
+        """Async variant of _fetch_location; the semaphore bounds requests in flight."""
         try:
-            self._setup_logger()  # Set up logger
+            date_ranges = self._missing_date_ranges(location)
+            if not date_ranges:
+                self._log_info(f"Stored weather data for {location} is up to date.")
+                return self._combine_location_data(location, [])
 
-            all_weather_data = []
+            # geopy is synchronous, so geocode on a worker thread
+            longitude, latitude = await asyncio.to_thread(self.get_coordinates, location)
 
-            for location in self.locations:
-                # Fetch coordinates
-                longitude, latitude = self.get_coordinates(location)
+            async def fetch_chunk(start_date, end_date):
+                if self.grid_dedup:
+                    weather_json = await self._fetch_cell_json_async(
+                        http, semaphore, *self.snap_to_grid(longitude, latitude), start_date, end_date
+                    )
+                else:
+                    async with semaphore:
+                        weather_json = await self.fetch_weather_data_async(http, longitude, latitude, start_date, end_date)
+                return self.process_weather_data(weather_json, location)
 
-                # Fetch weather data
-                weather_json = self.fetch_weather_data(longitude, latitude)
+            # Long ranges are split into chunks that share the request budget
+            chunks = [chunk for date_range in date_ranges for chunk in self.plan_date_chunks(*date_range)]
+            weather_frames = await asyncio.gather(*(fetch_chunk(*chunk) for chunk in chunks))
 
-                # Process the weather data
-                weather_df = self.process_weather_data(weather_json, location)
-                
-                all_weather_data.append(weather_df)
+            return self._combine_location_data(location, weather_frames)
+        except Exception as e:
+            self._log_error(f"Error fetching weather data for {location}: {e}")
+            return pd.DataFrame()
+
+    def _build_regional_url(self, bbox, parameters, start_date, end_date):
+        """Builds the POWER daily regional request URL for a (lon_min, lat_min, lon_max, lat_max) box."""
+        longitude_min, latitude_min, longitude_max, latitude_max = bbox
+        return (f"{self.regional_url}?parameters={parameters}&community=RE"
+                f"&latitude-min={latitude_min}&latitude-max={latitude_max}"
+                f"&longitude-min={longitude_min}&longitude-max={longitude_max}"
+                f"&start={start_date}&end={end_date}&format=JSON")
+
+    def _region_boxes(self, cells):
+        """Groups grid cells into tiles and returns {tile: bounding box} covering the cells of each tile."""
+        tiles = {}
+        for longitude, latitude in cells:
+            tile = (int(longitude // self.regional_tile_degrees), int(latitude // self.regional_tile_degrees))
+            tiles.setdefault(tile, []).append((longitude, latitude))
+
+        boxes = {}
+        for tile, tile_cells in tiles.items():
+            longitudes = [cell[0] for cell in tile_cells]
+            latitudes = [cell[1] for cell in tile_cells]
+            box = []
+            for low, high, limit in ((min(longitudes), max(longitudes), 180), (min(latitudes), max(latitudes), 90)):
+                # Widen boxes smaller than the API minimum around their centre
+                pad = max(0.0, (self.regional_min_degrees - (high - low)) / 2)
+                low, high = max(low - pad, -limit), min(high + pad, limit)
+                box.append((round(low, 4), round(high, 4)))
+            boxes[tile] = (box[0][0], box[1][0], box[0][1], box[1][1])
+        return boxes
+
+    def fetch_regional_data(self, bbox, start_date=None, end_date=None):
+        """Fetches every parameter for a bounding box and returns {(longitude, latitude): parameter records}.
+
+        Returns None when the box cannot be fetched, so only the locations inside it are lost.
+        """
+        start_date = start_date or self.start_date
+        end_date = end_date or self.end_date
+        try:
+            return self._fetch_regional_points(bbox, start_date, end_date)
+        except Exception as e:
+            self._log_error(f"Error fetching regional weather data for box {bbox} {start_date}-{end_date}: {e}")
+            return None
+
+    def _fetch_regional_points(self, bbox, start_date, end_date):
+        """fetch_regional_data without the error handling: failures raise."""
+        parameters = self.params.split(',')
+        groups = [','.join(parameters[i:i + self.regional_params_per_request])
+                  for i in range(0, len(parameters), self.regional_params_per_request)]
+
+        points = {}
+        for group in groups:
+            url = self._build_regional_url(bbox, group, start_date, end_date)
+            content = self._get_cached_response(url)
+            cached = content is not None
+            if not cached:
+                response = self._request_with_retry(url)
+                if response.status_code != 200:
+                    self._log_error(f"Regional API request failed with status code {response.status_code} for box {bbox}")
+                    return None
+                content = response.content
+
+            fill_values = False
+            for feature in json_loads(content).get('features', []):
+                longitude, latitude = feature['geometry']['coordinates'][:2]
+                records = points.setdefault((longitude, latitude), {})
+                for name, values in feature.get('properties', {}).get('parameter', {}).items():
+                    records.setdefault(name, {}).update(values)
+                    fill_values = fill_values or -999 in values.values()
+            if not cached:
+                self._cache_response(url, end_date, content, fill_values)
+        return points
+
+    def _fetch_locations_regional(self):
+        """Fetches all locations through the regional endpoint and returns their DataFrames in location order."""
+        date_ranges = {location: self._missing_date_ranges(location) for location in self.locations}
+        pending = [location for location in self.locations if date_ranges[location]]
 
-            if all_weather_data:
-                # Merge all the weather data
-                merged_weather_df = pd.concat(all_weather_data, ignore_index=True)
+        if self.max_workers and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                coordinates = dict(zip(pending, executor.map(self.get_coordinates, pending)))
+        else:
+            coordinates = {location: self.get_coordinates(location) for location in pending}
+        cells = {location: self.snap_to_grid(*coordinates[location]) for location in pending
+                 if None not in coordinates[location]}
 
-                # Remove duplicate rows based on 'date' and 'state'
-                merged_weather_df = merged_weather_df.drop_duplicates()
+        # One window per run: from the earliest to the latest date any location is missing
+        start_date = min((ranges[0][0] for ranges in date_ranges.values() if ranges), default=self.start_date)
+        end_date = max((ranges[-1][1] for ranges in date_ranges.values() if ranges), default=self.end_date)
+        chunks = self.plan_date_chunks(start_date, end_date)
+        boxes = self._region_boxes(set(cells.values()))
+        jobs = [(box, chunk) for box in boxes.values() for chunk in chunks]
 
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers or 1, len(jobs) or 1))) as executor:
+            results = list(executor.map(lambda job: self.fetch_regional_data(job[0], *job[1]), jobs))
+
+        points = {}
+        for result in results:
+            for point, records in (result or {}).items():
+                merged = points.setdefault(point, {})
+                for name, values in records.items():
+                    merged.setdefault(name, {}).update(values)
+        self._log_info(f"Regional extraction: {len(cells)} locations from {len(boxes)} boxes "
+                       f"in {len(jobs)} box/date chunks, {len(points)} grid points returned")
+
+        all_weather_data = []
+        for location in self.locations:
+            if not date_ranges[location]:
+                self._log_info(f"Stored weather data for {location} is up to date.")
+                all_weather_data.append(self._combine_location_data(location, []))
+                continue
+            cell = cells.get(location)
+            if cell is None or not points:
+                self._log_error(f"No regional weather data for {location}.")
+                all_weather_data.append(self._combine_location_data(location, []))
+                continue
+
+            # The returned grid points are cell centres; take the nearest one
+            point = min(points, key=lambda p: (p[0] - cell[0]) ** 2 + (p[1] - cell[1]) ** 2)
+            if abs(point[0] - cell[0]) > self.grid_lon_step or abs(point[1] - cell[1]) > self.grid_lat_step:
+                self._log_error(f"No regional weather data for {location}.")
+                all_weather_data.append(self._combine_location_data(location, []))
+                continue
+            weather_json = {'properties': {'parameter': points[point]}}
+            weather_df = self.process_weather_data(weather_json, location)
+            all_weather_data.append(self._combine_location_data(location, [weather_df]))
+        return all_weather_data
+
+    def _save_and_upload(self, all_weather_data):
+        """Merges the fetched DataFrames, saves them and uploads the result."""
+        self._cell_requests = OrderedDict()  # Every location has its own copy by now
+        if all_weather_data:
+            # Merge all the weather data, removing duplicate rows based on 'date' and 'state'
+            merged_weather_df = self.merge_weather_frames(all_weather_data)
+
+            if self.direct_upload:
+                file_path = self.upload_frame_to_s3(merged_weather_df)
+            else:
                 # Save the merged data to a single CSV
                 file_path = self.save_merged_weather_data([merged_weather_df])
 
-                # If everything is successful, log the info
-                self._log_info(f"Weather data successfully fetched and saved to: {file_path}")
+            # If everything is successful, log the info
+            self._log_info(f"Weather data successfully fetched and saved to: {file_path}")
+            self._grid_dedup_report()
+            self._log_run_stats()
+
+            if file_path and not self.direct_upload:
+                self.upload_csv_to_s3([file_path])  # Upload only what this run wrote
+
+        else:
+            self._log_error("No weather data fetched or processed successfully.")
+
+    def _open_output_stream(self):
+        """Opens a stream writer on the configured sink (or S3, with direct_upload) for this run's output."""
+        if self.direct_upload:
+            return self.open_s3_stream()
+        today_folder = os.path.join(self.data_directory, datetime.now().strftime('%Y-%m-%d'))
+        os.makedirs(today_folder, exist_ok=True)
+        return self.create_sink().open_stream(today_folder, f"weather_data_{self.start_date}_{self.end_date}")
+
+    def _write_streamed(self, stream, location, weather_df, progress):
+        """Appends one location's rows, keeping one row per (date, state) as merge_keep says; returns the row count.
+
+        progress holds the run's streaming state: "written" maps each state to the set of
+        day numbers written so far (later duplicates are dropped, so the first row wins),
+        and with merge_keep='last' the frames of a location listed more than once wait in
+        "held" until its last occurrence, then are merged so the last row wins.
+        """
+        remaining = progress["remaining"]
+        if remaining[location] > 1:
+            remaining[location] -= 1
+            progress["held"].setdefault(location, []).append(weather_df)
+            return 0
+        frames = [frame for frame in progress["held"].pop(location, []) + [weather_df] if not frame.empty]
+        if not frames:
+            return 0
+        weather_df = frames[0] if len(frames) == 1 else self.merge_weather_frames(frames)
+
+        days = self._date_values(weather_df).view(np.int64)
+        states = weather_df['state'].to_numpy()
+        keep = np.ones(len(weather_df), dtype=bool)
+        for state in pd.unique(states):
+            seen = progress["written"].setdefault(state, set())
+            rows = states == state
+            if seen:
+                keep[rows] &= ~np.isin(days[rows], np.fromiter(seen, dtype=np.int64, count=len(seen)))
+            seen.update(days[rows & keep].tolist())
 
-                self.upload_csv_to_s3()  # Upload CSV files from today's folder
+        if not keep.all():
+            weather_df = weather_df[keep]
+        if not weather_df.empty:
+            stream.write(self._output_frame(weather_df))
+        return len(weather_df)
 
+    def _stream_progress(self):
+        """Returns the empty streaming state used by _write_streamed."""
+        # Rows are labelled with their location, so duplicate keys only come from repeated locations
+        remaining = Counter(self.locations) if self.merge_keep == 'last' else Counter()
+        return {"written": {}, "held": {}, "remaining": remaining}
+
+    def _finish_stream(self, stream, file_path, rows_written):
+        """Logs and uploads the output of a streaming run."""
+        self._cell_requests = OrderedDict()
+        if rows_written:
+            self._log_info(f"Weather data successfully fetched and streamed to: {file_path} ({rows_written} rows)")
+            self._grid_dedup_report()
+            self._log_run_stats()
+            if self.direct_upload:
+                self._record_direct_upload(stream.writer)
+            else:
+                self.upload_csv_to_s3([file_path])  # Upload only what this run wrote
+        else:
+            self._log_error("No weather data fetched or processed successfully.")
+
+    def _stream_locations(self):
+        """Fetches locations with at most `stream_window` results waiting and writes each one in order."""
+        window = self.stream_window or 2 * max(self.max_workers or 1, 1)
+        stream = self._open_output_stream()
+        progress = self._stream_progress()
+        rows_written = 0
+        try:
+            if self.extraction_mode == 'regional':
+                for location, weather_df in zip(self.locations, self._fetch_locations_regional()):
+                    rows_written += self._write_streamed(stream, location, weather_df, progress)
             else:
-                self._log_error("No weather data fetched or processed successfully.")
+                with ThreadPoolExecutor(max_workers=max(self.max_workers or 1, 1)) as executor:
+                    pending = deque()
+                    for location in self.locations:
+                        pending.append((location, executor.submit(self._fetch_location, location)))
+                        if len(pending) >= window:
+                            location, future = pending.popleft()
+                            rows_written += self._write_streamed(stream, location, future.result(), progress)
+                    while pending:
+                        location, future = pending.popleft()
+                        rows_written += self._write_streamed(stream, location, future.result(), progress)
+        except BaseException:
+            stream.abort()
+            raise
+        file_path = stream.close()
+        self._finish_stream(stream, file_path, rows_written)
+
+    async def _stream_locations_async(self, http, semaphore, window):
+        """Async variant of _stream_locations."""
+        stream = self._open_output_stream()
+        progress = self._stream_progress()
+        rows_written = 0
+        pending = deque()
+        try:
+            for location in self.locations:
+                pending.append((location, asyncio.ensure_future(self._fetch_location_async(http, semaphore, location))))
+                if len(pending) >= window:
+                    location, task = pending.popleft()
+                    rows_written += self._write_streamed(stream, location, await task, progress)
+            while pending:
+                location, task = pending.popleft()
+                rows_written += self._write_streamed(stream, location, await task, progress)
+        except BaseException:
+            for _, task in pending:
+                task.cancel()
+            stream.abort()
+            raise
+        file_path = stream.close()
+        self._finish_stream(stream, file_path, rows_written)
+
+    def _log_run_stats(self):
+        """Writes the HTTP and cache counters of this run to the info log."""
+        self._log_info(f"HTTP connection stats: {self.connection_stats()}")
+        self._log_info(f"Rate limiter stats: {self.rate_limiter.stats()}")
+        if self.geocode_cache:
+            self._log_info(f"Geocode cache stats: {self.geocode_cache.stats()}")
+        if self.response_cache:
+            self._log_info(f"Response cache stats: {self.response_cache.stats()}")
+
+    def _resolve_cache_paths(self):
+        """Points the caches at the current data_directory, which may have been reassigned since construction."""
+        geocode_cache_path = os.path.join(self.data_directory, "geocode_cache.sqlite")
+        if self.geocode_cache and self.geocode_cache.path != geocode_cache_path:
+            self.geocode_cache = GeocodeCache(geocode_cache_path)
+        response_cache_directory = os.path.join(self.data_directory, "http_cache")
+        if self.response_cache and self.response_cache.directory != response_cache_directory:
+            self.response_cache = ResponseCache(response_cache_directory)
+
+    def _start_run(self):
+        """Sets up logging and resets the per-run state shared by both engines."""
+        self._setup_logger()  # Set up logger
+        self._resolve_cache_paths()
+        self._stored_weather = self._load_stored_weather_data() if self.incremental else {}
+        self._cell_requests = OrderedDict()
+        self._grid_cells = set()
+        self.requests_saved = 0
+
+    def fetch_and_process_weather(self):
+        """Main method to fetch, process, and save weather data."""
+        try:
+            self._start_run()
+
+            if self.streaming:
+                self._stream_locations()
+                return
+
+            if self.extraction_mode == 'regional':
+                all_weather_data = self._fetch_locations_regional()
+            elif self.max_workers and self.max_workers > 1:
+                # Overlap the network round trips; map() keeps the results in location order
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    all_weather_data = list(executor.map(self._fetch_location, self.locations))
+            else:
+                all_weather_data = [self._fetch_location(location) for location in self.locations]
+
+            self._save_and_upload(all_weather_data)
 
         except Exception as e:
             # If any error occurs, log the error but skip info log
             self._log_error(f"Error in fetching and processing weather data: {e}")
+        finally:
+            self.flush_logs()  # The run's log is complete on disk when it returns
+
+    async def fetch_and_process_weather_async(self, concurrency=100):
+        """Asyncio variant of fetch_and_process_weather with at most `concurrency` requests in flight."""
+        try:
+            if aiohttp is None:
+                self._setup_logger()
+                self._log_error("The asyncio engine requires the 'aiohttp' package.")
+                return
+            self._start_run()
+
+            if self.extraction_mode == 'regional':
+                if self.streaming:
+                    await asyncio.to_thread(self._stream_locations)
+                    return
+                # Few, large requests: the threaded regional path is already enough
+                all_weather_data = await asyncio.to_thread(self._fetch_locations_regional)
+                self._save_and_upload(all_weather_data)
+                return
+
+            semaphore = asyncio.Semaphore(concurrency)
+            connector = aiohttp.TCPConnector(limit=concurrency)
+            timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_async_connection_created)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[trace_config],
+                                             headers={"Accept-Encoding": "gzip, deflate"}) as http:
+                if self.streaming:
+                    await self._stream_locations_async(http, semaphore, self.stream_window or concurrency)
+                    return
+
+                # gather() keeps the results in location order
+                all_weather_data = await asyncio.gather(
+                    *(self._fetch_location_async(http, semaphore, location) for location in self.locations)
+                )
+
+            self._save_and_upload(list(all_weather_data))
+
+        except Exception as e:
+            self._log_error(f"Error in fetching and processing weather data: {e}")
+        finally:
+            await asyncio.to_thread(self.flush_logs)
 
 
 if __name__ == "__main__":
@@ -233,7 +2648,8 @@ if __name__ == "__main__":
     start_date = "20241201"
     end_date = "20241231"
 
-    weather_fetcher = WeatherDataFetcher(locations, start_date, end_date)
+    weather_fetcher = WeatherDataFetcher(locations, start_date, end_date, max_workers=4)
     weather_fetcher.fetch_and_process_weather()  # Fetch, process, and upload weather data
+    weather_fetcher.close()
 
     print('\nExecution Successfully Completed\n') 
\ No newline at end of file